@@ -17,6 +17,7 @@ from ui.expense_form import render_expense_form
 from ui.overview import render_overview
 from ui.visualization import render_visualization
 from ui.top_expenses import render_top_expenses
+from ui.filter_form import get_filtered_expenses, render_filter_form
 
 # Initialize the database tables
 db.init_db()
@@ -48,130 +49,30 @@ with open(css_file) as f:
 # Initialize session state for persistent user data
 session_state = st.session_state
 
-# Initialize undo and redo stacks to keep track of actions
-if "undo_stack" not in session_state:
-    session_state.undo_stack = []
+# Create the FamilyExpenseTracker object only once per session
+if "expense_tracker" not in session_state:
+    session_state.expense_tracker = FamilyExpenseTracker()
 
-if "redo_stack" not in session_state:
-    session_state.redo_stack = []
+# Undo and redo replay the command log stored in the database, so the history
+# survives a browser refresh; each step is one id lookup in one transaction
+undo_count, redo_count = session_state.expense_tracker.undo_redo_counts()
 
 # Undo button in sidebar
-if st.sidebar.button("Undo"):
-    if session_state.undo_stack:
-        # Pop the last action from the undo stack
-        last_action = session_state.undo_stack.pop()
-
-        if last_action.action_type == "add_expense":
-            # Undo adding an expense, basically find the expense object and remove it
-            item = last_action.item
-            to_delete = None
-            for exp in session_state.expense_tracker.expense_list:
-                if (exp.value == item["value"] and exp.category == item["category"]
-                    and exp.description == item["description"] and exp.date == item["date"]):
-                    to_delete = exp
-                    break
-            if to_delete:
-                session_state.expense_tracker.delete_expense(to_delete)
-                
-                # Rebuild heap to keep it in sync
-                session_state.expense_tracker.rebuild_expense_heap()
-        
-        # Handle undo for deleting an expense
-        elif last_action.action_type == "delete_expense":
-            item = last_action.item
-            session_state.expense_tracker.add_expense(
-                item["value"], item["category"], item["description"], item["date"]
-            )
-            session_state.expense_tracker.rebuild_expense_heap()
-
-        # Handle undo for adding a member
-        elif last_action.action_type == "add_member":
-            # Undo adding a member, basically find the member object and remove it
-            item = last_action.item
-            to_delete = None
-            for member in session_state.expense_tracker.members:
-                if (member.name == item["name"] and
-                    member.earning_status == item["earning_status"] and
-                    member.earnings == item["earnings"]):
-                    to_delete = member
-                    break
-            if to_delete:
-                session_state.expense_tracker.delete_family_member(to_delete)
-        
-        # Handle undo for deleting a member
-        elif last_action.action_type == "delete_member":
-            item = last_action.item
-            session_state.expense_tracker.add_family_member(
-                item["name"], item["earning_status"], item["earnings"]
-            )
-        # Push the undone action onto the redo stack for possible redo
-        session_state.redo_stack.append(last_action)
-
+if st.sidebar.button(f"Undo ({undo_count})", key="undo_button"):
+    if session_state.expense_tracker.undo() is not None:
+        st.experimental_rerun()
     else:
         # Inform the user if there is nothing to undo
         st.sidebar.info("Nothing to undo.")
 
 # Redo button in sidebar
-if st.sidebar.button("Redo"):
-    if session_state.redo_stack:
-        # Pop the last action from the redo stack
-        action = session_state.redo_stack.pop()
-
-        if action.action_type == "add_expense":
-            # Redo adding an expense by re-adding it
-            item = action.item
-            session_state.expense_tracker.add_expense(
-                item["value"], item["category"], item["description"], item["date"]
-            )
-
-            # Rebuild heap after redo add
-            session_state.expense_tracker.rebuild_expense_heap()
-
-        # Redo deleting an expense
-        elif action.action_type == "delete_expense":
-            item = action.item
-            to_delete = None
-            # Find matching expense to delete
-            for exp in session_state.expense_tracker.expense_list:
-                if (exp.value == item["value"] and exp.category == item["category"]
-                    and exp.description == item["description"] and exp.date == item["date"]):
-                    to_delete = exp
-                    break
-            if to_delete:
-                session_state.expense_tracker.delete_expense(to_delete)
-                session_state.expense_tracker.rebuild_expense_heap()
-
-        # Redo adding a member
-        elif action.action_type == "add_member":
-            # Redo adding a member by re-adding it
-            item = action.item
-            session_state.expense_tracker.add_family_member(
-                item["name"], item["earning_status"], item["earnings"]
-            )
-
-        elif action.action_type == "delete_member":
-            item = action.item
-            to_delete = None
-            # Find member to delete
-            for member in session_state.expense_tracker.members:
-                if (member.name == item["name"] and member.earning_status == item["earning_status"]
-                    and member.earnings == item["earnings"]):
-                    to_delete = member
-                    break
-            if to_delete:
-                session_state.expense_tracker.delete_family_member(to_delete)
-
-        # Push redone action back onto undo stack
-        session_state.undo_stack.append(action)
-
+if st.sidebar.button(f"Redo ({redo_count})", key="redo_button"):
+    if session_state.expense_tracker.redo() is not None:
+        st.experimental_rerun()
     else:
         # Inform the user if there is nothing to redo
         st.sidebar.info("Nothing to redo.")
 
-# Create the FamilyExpenseTracker object only once per session
-if "expense_tracker" not in session_state:
-    session_state.expense_tracker = FamilyExpenseTracker()
-
 # Set up the top navigation menu
 selected = option_menu(
     menu_title=None,
@@ -221,14 +122,18 @@ if selected == "Data Entry":
     )
 
 
-elif selected == "Data Overview":
+elif selected in ("Data Overview", "Data Visualization"):
+    # One filtered view per rerun, shared by every page below (None = no filter)
+    filters = render_filter_form(session_state)
+    filtered_expenses = None if filters is None else get_filtered_expenses(session_state, filters)
 
-    # Pass filtered expenses to the overview render function
-    render_overview(session_state)
+    if selected == "Data Overview":
+        # Pass filtered expenses to the overview render function
+        render_overview(session_state, filtered_expenses)
 
-    # Render top expenses
-    render_top_expenses(session_state, n=5)
-        
-# Render the graphs for visualization of expenses
-elif selected == "Data Visualization":
-    render_visualization(session_state)
+        # Render top expenses
+        render_top_expenses(session_state, n=5, filtered_expenses=filtered_expenses)
+
+    # Render the graphs for visualization of expenses
+    else:
+        render_visualization(session_state, filtered_expenses)
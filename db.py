@@ -1,51 +1,331 @@
+import json
 import sqlite3
+import threading
+from contextlib import contextmanager
+from utils.conversions import to_cents, to_day
+#from datetime import datetime
 
-# Define the database filename
-DB_FILE = 'family_expense_tracker.db'
+DB_FILE = 'family_expense_tracker.db'  # Database file name
 
-def get_connection():
+# Pragma profile applied once when a pooled connection is opened.
+# WAL lets one Streamlit session read while another writes, and with WAL
+# synchronous=NORMAL only fsyncs at checkpoints instead of on every commit.
+PRAGMAS = {
+    "foreign_keys": "ON",          # Enforce foreign key constraints
+    "journal_mode": "WAL",         # Readers don't block writers
+    "synchronous": "NORMAL",       # Safe with WAL, far fewer fsyncs
+    "mmap_size": 64 * 1024 * 1024, # Memory-map up to 64 MB of the file
+    "cache_size": -16000,          # Negative means KiB, so ~16 MB page cache
+    "busy_timeout": 5000,          # Wait up to 5 s on a locked database
+}
+
+# Connections parked by finished threads, reused by the next thread that needs one
+MAX_IDLE_CONNECTIONS = 8
+
+_local = threading.local()
+_idle = []
+_idle_lock = threading.Lock()
+_profile_version = 0
+
+# Write generation: bumped whenever a transaction commits in this process, or
+# when a connection's PRAGMA data_version shows another process committed.
+# Readers compare it to decide whether cached query results are still valid.
+_generation = 0
+_generation_lock = threading.Lock()
+_seen_data_version = {}  # id(connection) -> last (PRAGMA data_version, total_changes) seen
+
+
+class _Lease:
     """
-    Create and return a new SQLite database connection.
-    Enables foreign key support for relational integrity.
+    A thread's claim on one pooled connection.
+    Stored in thread-local storage, so when the thread exits (Streamlit starts
+    a new script thread for every rerun) the lease is collected and the
+    connection goes back to the idle pool instead of being leaked.
     """
-    conn = sqlite3.connect(DB_FILE)
-    conn.execute("PRAGMA foreign_keys = ON;")  # Make sure foreign keys work
-    return conn
 
-import sqlite3
-#from datetime import datetime
+    def __init__(self, conn, db_file):
+        self.conn = conn
+        self.db_file = db_file
+        self.profile_version = -1
+
+    def __del__(self):
+        if self.conn is not None:
+            _release(self.conn, self.db_file)
+
+
+def _release(conn, db_file):
+    # Never hand out a connection with a half-finished transaction
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+    except sqlite3.Error:
+        return
+    with _idle_lock:
+        if len(_idle) < MAX_IDLE_CONNECTIONS:
+            _idle.append((db_file, conn))
+            return
+    _close(conn)
+
+def _close(conn):
+    # Close a pooled connection and forget its data_version bookkeeping
+    _seen_data_version.pop(id(conn), None)
+    conn.close()
+
+
+def _apply_pragmas(conn):
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def _open(db_file):
+    # Prefer a parked connection to the same file over opening a new one
+    with _idle_lock:
+        for i, (idle_file, conn) in enumerate(_idle):
+            if idle_file == db_file:
+                del _idle[i]
+                return conn
+    # check_same_thread is off because a connection can move to a new thread
+    # through the idle pool; the lease guarantees one thread uses it at a time
+    return sqlite3.connect(db_file, check_same_thread=False)
 
-DB_FILE = 'family_expense_tracker.db'  # Database file name
 
 def get_connection():
     """
-    Create and return a new SQLite database connection.
-    Enables foreign key support for relational integrity.
+    Return this thread's pooled SQLite connection, opening it on first use.
+    The connection is reused by every call on the same thread, and the
+    pragma profile in PRAGMAS is applied once rather than on every call.
     """
-    conn = sqlite3.connect(DB_FILE)
-    conn.execute("PRAGMA foreign_keys = ON;")  # Enable foreign key constraints
-    return conn
+    lease = getattr(_local, "lease", None)
+    if lease is None or lease.db_file != DB_FILE:
+        if lease is not None:
+            # DB_FILE was changed (e.g. by tests); drop the old lease first
+            _local.lease = None
+            del lease
+        lease = _Lease(_open(DB_FILE), DB_FILE)
+        _local.lease = lease
+    if lease.profile_version != _profile_version:
+        _apply_pragmas(lease.conn)
+        lease.profile_version = _profile_version
+    return lease.conn
 
-def init_db():
+def configure_pragmas(**pragmas):
     """
-    Initialize the database with required tables if they do not exist.
-    Creates 'family_members' and 'expenses' tables with appropriate schema.
+    Override entries of the pragma profile, e.g. configure_pragmas(synchronous="FULL").
+    Every pooled connection re-applies the profile on its next use.
     """
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Create family_members table with id, name, earning status, and earnings
-        cursor.execute('''
+    global _profile_version
+    PRAGMAS.update(pragmas)
+    _profile_version += 1
+
+def close_connection():
+    """
+    Close this thread's pooled connection, if it has one.
+    """
+    lease = getattr(_local, "lease", None)
+    if lease is not None:
+        _local.lease = None
+        _close(lease.conn)
+        lease.conn = None  # Nothing left to hand back to the pool
+
+def close_all_connections():
+    """
+    Close this thread's connection and every idle pooled connection.
+    """
+    close_connection()
+    with _idle_lock:
+        idle = _idle[:]
+        _idle.clear()
+    for _, conn in idle:
+        _close(conn)
+
+@contextmanager
+def transaction(immediate=False):
+    """
+    Group writes into a single commit on this thread's connection.
+    The outermost block commits when it exits cleanly. Every block, nested or
+    not, runs inside its own SAVEPOINT, so an exception rolls back only the
+    writes made inside that block and is then re-raised.
+    immediate=True takes the write lock when the outermost block starts, for
+    read-then-write blocks that must not race another writer.
+    """
+    conn = get_connection()
+    depth = getattr(_local, "tx_depth", 0)
+    savepoint = f"tx_{depth}"
+    if immediate and depth == 0 and not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    conn.execute(f"SAVEPOINT {savepoint}")
+    _local.tx_depth = depth + 1
+    try:
+        yield conn
+    except BaseException:
+        conn.execute(f"ROLLBACK TO {savepoint}")
+        conn.execute(f"RELEASE {savepoint}")
+        if depth == 0 and conn.in_transaction:
+            conn.rollback()  # End the BEGIN IMMEDIATE transaction as well
+        # Anything read and cached inside the block may reflect rolled-back writes
+        _bump_generation()
+        raise
+    else:
+        conn.execute(f"RELEASE {savepoint}")
+        if depth == 0:
+            conn.commit()
+            _note_own_commit(conn)
+            _bump_generation()
+    finally:
+        _local.tx_depth = depth
+
+def in_transaction():
+    """
+    Return True while a transaction() block is open on this thread.
+    """
+    return getattr(_local, "tx_depth", 0) > 0
+
+def _bump_generation():
+    global _generation
+    with _generation_lock:
+        _generation += 1
+
+def _note_own_commit(conn):
+    # transaction() bumps the generation itself; record this connection's
+    # total_changes so data_generation() does not count the same commit twice
+    seen = _seen_data_version.get(id(conn))
+    if seen is not None:
+        _seen_data_version[id(conn)] = (seen[0], conn.total_changes)
+
+def data_generation():
+    """
+    Return a number that changes whenever the stored data may have changed.
+    Commits made through transaction() bump it directly. Commits from other
+    connections are caught through PRAGMA data_version, which changes on this
+    thread's connection when any other connection has committed since its
+    last check, and raw writes on this connection itself through its
+    total_changes counter. A connection seen for the first time also bumps
+    it, since nothing is known about what it missed.
+    """
+    conn = get_connection()
+    state = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+    if _seen_data_version.get(id(conn)) != state:
+        _seen_data_version[id(conn)] = state
+        _bump_generation()
+    return _generation
+
+# -----------------
+# Schema Migrations
+# -----------------
+
+# Day ordinal + JULIAN_DAY_OFFSET is the Julian day number SQLite's date
+# functions understand, e.g. date(day + 1721424.5) -> 'YYYY-MM-DD'.
+JULIAN_DAY_OFFSET = 1721424.5
+
+# Summary tables kept current by triggers on expenses, so dashboard totals
+# read a handful of pre-aggregated rows instead of scanning every expense.
+# Each maps to the SQL expression (over an expenses row) of its period key.
+ROLLUP_TABLES = {
+    "daily_totals": ("day", "{row}.day"),
+    "monthly_totals": ("month", f"strftime('%Y-%m', {{row}}.day + {JULIAN_DAY_OFFSET})"),
+}
+
+def _rollup_add_sql(table, row):
+    # Add one expense row (NEW or OLD alias) to a rollup table
+    period, key = ROLLUP_TABLES[table]
+    return f'''
+        INSERT INTO {table} ({period}, category, member_key, total_cents, expense_count)
+        VALUES ({key.format(row=row)}, {row}.category, COALESCE({row}.member_id, 0), {row}.value_cents, 1)
+        ON CONFLICT ({period}, category, member_key) DO UPDATE SET
+            total_cents = total_cents + excluded.total_cents,
+            expense_count = expense_count + 1;
+    '''
+
+def _rollup_remove_sql(table, row):
+    # Subtract one expense row from a rollup table, dropping groups that become empty
+    period, key = ROLLUP_TABLES[table]
+    match = (f"{period} = {key.format(row=row)} AND category = {row}.category "
+             f"AND member_key = COALESCE({row}.member_id, 0)")
+    return f'''
+        UPDATE {table} SET total_cents = total_cents - {row}.value_cents,
+                           expense_count = expense_count - 1
+        WHERE {match};
+        DELETE FROM {table} WHERE {match} AND expense_count = 0;
+    '''
+
+def _rollup_rebuild_sql(table):
+    # Recompute a rollup table from the expenses table
+    period, key = ROLLUP_TABLES[table]
+    return [
+        f"DELETE FROM {table}",
+        f'''
+            INSERT INTO {table} ({period}, category, member_key, total_cents, expense_count)
+            SELECT {key.format(row="expenses")}, category, COALESCE(member_id, 0), SUM(value_cents), COUNT(*)
+            FROM expenses
+            GROUP BY 1, 2, 3
+        ''',
+    ]
+
+def _rollup_migration():
+    # Tables, triggers and initial fill for the rollup tables
+    statements = [
+        '''
+            CREATE TABLE IF NOT EXISTS daily_totals (
+                day INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                member_key INTEGER NOT NULL,
+                total_cents INTEGER NOT NULL,
+                expense_count INTEGER NOT NULL,
+                PRIMARY KEY (day, category, member_key)
+            ) WITHOUT ROWID
+        ''',
+        '''
+            CREATE TABLE IF NOT EXISTS monthly_totals (
+                month TEXT NOT NULL,
+                category TEXT NOT NULL,
+                member_key INTEGER NOT NULL,
+                total_cents INTEGER NOT NULL,
+                expense_count INTEGER NOT NULL,
+                PRIMARY KEY (month, category, member_key)
+            ) WITHOUT ROWID
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS trg_expenses_rollup_insert AFTER INSERT ON expenses
+            BEGIN
+                {"".join(_rollup_add_sql(table, "NEW") for table in ROLLUP_TABLES)}
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS trg_expenses_rollup_delete AFTER DELETE ON expenses
+            BEGIN
+                {"".join(_rollup_remove_sql(table, "OLD") for table in ROLLUP_TABLES)}
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS trg_expenses_rollup_update
+            AFTER UPDATE OF value_cents, category, day, member_id ON expenses
+            BEGIN
+                {"".join(_rollup_remove_sql(table, "OLD") for table in ROLLUP_TABLES)}
+                {"".join(_rollup_add_sql(table, "NEW") for table in ROLLUP_TABLES)}
+            END
+        ''',
+    ]
+    for table in ROLLUP_TABLES:
+        statements.extend(_rollup_rebuild_sql(table))
+    return statements
+
+# Ordered (version, description, statements) entries. init_db applies every
+# migration whose version is above PRAGMA user_version, then records the new
+# version, all in one write-locked transaction, so each migration runs once.
+# Not every statement is idempotent (migration 5 copies and drops a table).
+MIGRATIONS = [
+    (1, "Create family_members and expenses tables", [
+        # family_members: id, name, earning status, and earnings
+        '''
             CREATE TABLE IF NOT EXISTS family_members (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
                 earning_status INTEGER NOT NULL,
                 earnings REAL NOT NULL
             )
-        ''')
-
-        # Create expenses table with id, value, category, description, date, and member_id foreign key
-        cursor.execute('''
+        ''',
+        # expenses: id, value, category, description, date, and member_id foreign key
+        '''
             CREATE TABLE IF NOT EXISTS expenses (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 value REAL NOT NULL,
@@ -55,10 +335,110 @@ def init_db():
                 member_id INTEGER,
                 FOREIGN KEY(member_id) REFERENCES family_members(id) ON DELETE SET NULL
             )
-        ''')
+        ''',
+    ]),
+    # The indexes below carry value as their last column so date-range sums
+    # are answered from the index alone, without touching the table rows.
+    (2, "Index expenses by date", [
+        "CREATE INDEX IF NOT EXISTS idx_expenses_date_value ON expenses (date, value)",
+    ]),
+    (3, "Index expenses by category and date", [
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses (category, date, value)",
+    ]),
+    (4, "Index expenses by member and date", [
+        "CREATE INDEX IF NOT EXISTS idx_expenses_member_date ON expenses (member_id, date, value)",
+    ]),
+    # Store money as integer cents and dates as day ordinals (see utils/conversions.py).
+    # SQLite cannot change column types in place, so the table is rebuilt and
+    # the indexes above are recreated on the new columns.
+    (5, "Store expense values as cents and dates as day ordinals", [
+        '''
+            CREATE TABLE IF NOT EXISTS expenses_v5 (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                value_cents INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                description TEXT,
+                day INTEGER NOT NULL,
+                member_id INTEGER,
+                FOREIGN KEY(member_id) REFERENCES family_members(id) ON DELETE SET NULL
+            )
+        ''',
+        f'''
+            INSERT INTO expenses_v5 (id, value_cents, category, description, day, member_id)
+            SELECT id, CAST(ROUND(value * 100) AS INTEGER), category, description,
+                   CAST(julianday(substr(date, 1, 10)) - {JULIAN_DAY_OFFSET} AS INTEGER), member_id
+            FROM expenses
+        ''',
+        # Carry over the AUTOINCREMENT high-water mark so ids of deleted rows are never reused
+        "DELETE FROM sqlite_sequence WHERE name = 'expenses_v5'",
+        "UPDATE sqlite_sequence SET name = 'expenses_v5' WHERE name = 'expenses'",
+        "DROP TABLE expenses",
+        "ALTER TABLE expenses_v5 RENAME TO expenses",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_day_value ON expenses (day, value_cents)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category_day ON expenses (category, day, value_cents)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_member_day ON expenses (member_id, day, value_cents)",
+    ]),
+    # member_key is member_id, or 0 for expenses without a member, because a
+    # NULL would never match in the primary key lookups the triggers do.
+    (6, "Add trigger-maintained daily and monthly rollup tables", _rollup_migration()),
+    # Lets get_expense_page seek straight to a (day, id) key in either direction
+    (7, "Index expenses by (day, id) for keyset pagination", [
+        "CREATE INDEX IF NOT EXISTS idx_expenses_day_id ON expenses (day, id)",
+    ]),
+    # ORDER BY value_cents DESC LIMIT k reads just k index entries
+    (8, "Index expenses by value for top-K queries", [
+        "CREATE INDEX IF NOT EXISTS idx_expenses_value ON expenses (value_cents)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category_value ON expenses (category, value_cents)",
+    ]),
+    # Undo/redo history (see record_command). row is a JSON snapshot of the
+    # expense or member, enough to put it back under the same id.
+    (9, "Add command_log table for undo/redo", [
+        '''
+            CREATE TABLE IF NOT EXISTS command_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                command TEXT NOT NULL,
+                target_id INTEGER NOT NULL,
+                row TEXT NOT NULL,
+                undone INTEGER NOT NULL DEFAULT 0
+            )
+        ''',
+        # Newest undoable and oldest redoable entries are one index seek away
+        "CREATE INDEX IF NOT EXISTS idx_command_log_undone ON command_log (undone, id)",
+    ]),
+    # Category sorts compare case-insensitively (EXPENSE_SORT_COLUMNS), which
+    # only an index with the same collation can serve in order
+    (10, "Index expenses by case-folded category and value for sorting", [
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category_nocase ON expenses (category COLLATE NOCASE, value_cents)",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]  # Version of a fully migrated database
 
-        # Commit the schema changes
-        conn.commit()
+def get_schema_version():
+    """
+    Return the schema version recorded in PRAGMA user_version.
+    """
+    return get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+def init_db():
+    """
+    Create or upgrade the database schema.
+    Applies, in order, every migration newer than the stored schema version.
+    Cheap to call on every rerun once the database is up to date.
+    """
+    if get_schema_version() >= SCHEMA_VERSION:
+        return
+    # Take the write lock before reading the version, so sessions starting at
+    # once queue on busy_timeout instead of racing from read to write
+    with transaction(immediate=True) as conn:
+        # Re-read under the lock in case another session just migrated
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, _, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
 
 # ----------------------------------
 # CRUD Operations for Family Members
@@ -70,31 +450,43 @@ def add_family_member(name, earning_status, earnings):
     earning_status should be boolean; stored as INTEGER (1/0) in DB.
     Returns the inserted member's id.
     """
-    with get_connection() as conn:
+    with transaction() as conn:
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO family_members (name, earning_status, earnings)
             VALUES (?, ?, ?)
         ''', (name, int(earning_status), earnings))
-        conn.commit()
         return cursor.lastrowid
 
+def add_family_members_bulk(members):
+    """
+    Add many family members in one transaction with a single executemany.
+    members is an iterable of (name, earning_status, earnings) tuples.
+    Returns the number of inserted rows.
+    """
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO family_members (name, earning_status, earnings)
+            VALUES (?, ?, ?)
+        ''', ((name, int(earning_status), earnings) for name, earning_status, earnings in members))
+        return cursor.rowcount
+
 def get_family_members():
     """
     Retrieve all family members.
     Returns a list of tuples: (id, name, earning_status, earnings)
     """
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, name, earning_status, earnings FROM family_members')
-        return cursor.fetchall()
+    cursor = get_connection().cursor()
+    cursor.execute('SELECT id, name, earning_status, earnings FROM family_members')
+    return cursor.fetchall()
 
 def update_family_member(member_id, name=None, earning_status=None, earnings=None):
     """
     Update family member fields selectively.
     Only provided fields are updated.
     """
-    with get_connection() as conn:
+    with transaction() as conn:
         cursor = conn.cursor()
         updates = []
         params = []
@@ -110,16 +502,14 @@ def update_family_member(member_id, name=None, earning_status=None, earnings=Non
         params.append(member_id)
         sql = f"UPDATE family_members SET {', '.join(updates)} WHERE id = ?"
         cursor.execute(sql, params)
-        conn.commit()
 
 def delete_family_member(member_id):
     """
     Delete a family member by id.
     """
-    with get_connection() as conn:
+    with transaction() as conn:
         cursor = conn.cursor()
         cursor.execute('DELETE FROM family_members WHERE id = ?', (member_id,))
-        conn.commit()
 
 # ----------------------------
 # CRUD Operations for Expenses
@@ -128,41 +518,381 @@ def delete_family_member(member_id):
 def add_expense(value, category, description, date_str, member_id=None):
     """
     Add a new expense.
-    date_str should be in 'YYYY-MM-DD' ISO format.
+    date_str should be in 'YYYY-MM-DD' ISO format (a datetime.date also works).
     member_id is optional foreign key to family_members.
     Returns the inserted expense's id.
     """
-    with get_connection() as conn:
+    with transaction() as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            INSERT INTO expenses (value, category, description, date, member_id)
+            INSERT INTO expenses (value_cents, category, description, day, member_id)
             VALUES (?, ?, ?, ?, ?)
-        ''', (value, category, description, date_str, member_id))
-        conn.commit()
+        ''', (to_cents(value), category, description, to_day(date_str), member_id))
         return cursor.lastrowid
 
+def add_expenses_bulk(expenses):
+    """
+    Add many expenses in one transaction with a single executemany,
+    so a whole import costs one commit instead of one per row.
+    expenses is an iterable of (value, category, description, date_str)
+    or (value, category, description, date_str, member_id) tuples.
+    Returns the number of inserted rows.
+    """
+    rows = (
+        (to_cents(expense[0]), expense[1], expense[2], to_day(expense[3]),
+         expense[4] if len(expense) == 5 else None)
+        for expense in expenses
+    )
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO expenses (value_cents, category, description, day, member_id)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        return cursor.rowcount
+
 def get_expenses():
     """
     Retrieve all expenses.
     Returns a list of tuples: (id, value, category, description, date, member_id)
+    with value in currency units and date as a 'YYYY-MM-DD' string.
+    Prefer query_expenses, which returns the compact stored form.
     """
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, value, category, description, date, member_id FROM expenses')
-        return cursor.fetchall()
+    cursor = get_connection().cursor()
+    cursor.execute(f'''
+        SELECT id, value_cents / 100.0, category, description,
+               date(day + {JULIAN_DAY_OFFSET}), member_id
+        FROM expenses
+    ''')
+    return cursor.fetchall()
+
+# Columns of an expense row in stored form, as returned by query_expenses
+EXPENSE_COLUMNS = "id, value_cents, category, description, day, member_id"
+
+# Columns filtered queries may sort on, mapped to their SQL expressions
+EXPENSE_SORT_COLUMNS = {
+    "id": "id",
+    "date": "day",
+    "value": "value_cents",
+    "category": "category COLLATE NOCASE",  # Case-insensitive, like ExpenseSorter's category.lower()
+    "member_id": "member_id",
+}
+
+def _expense_filter_clause(start_date=None, end_date=None, categories=None,
+                           min_amount=None, max_amount=None, member_id=None):
+    """
+    Build a WHERE clause and its parameters from optional expense filters.
+    Dates are datetime.date objects; both ends of the range are inclusive.
+    Amounts are in currency units and compared as integer cents.
+    Returns (sql, params) where sql is '' when no filter is given.
+    """
+    conditions = []
+    params = []
+    if start_date is not None:
+        conditions.append("day >= ?")
+        params.append(to_day(start_date))
+    if end_date is not None:
+        conditions.append("day <= ?")
+        params.append(to_day(end_date))
+    if categories is not None:
+        categories = list(categories)
+        if categories:
+            conditions.append(f"category IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        else:
+            conditions.append("0")  # An empty category selection matches nothing
+    if min_amount is not None:
+        conditions.append("value_cents >= ?")
+        params.append(to_cents(min_amount))
+    if max_amount is not None:
+        conditions.append("value_cents <= ?")
+        params.append(to_cents(max_amount))
+    if member_id is not None:
+        conditions.append("member_id = ?")
+        params.append(member_id)
+    sql = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return sql, params
+
+def _order_by_clause(order_by):
+    """
+    Turn [(column, ascending), ...] (or a single column name) into an ORDER BY clause.
+    Only columns listed in EXPENSE_SORT_COLUMNS are accepted.
+    """
+    if not order_by:
+        return ""
+    if isinstance(order_by, str):
+        order_by = [(order_by, True)]
+    terms = []
+    for column, ascending in order_by:
+        if column not in EXPENSE_SORT_COLUMNS:
+            raise ValueError(f"Cannot sort expenses by '{column}'")
+        terms.append(f"{EXPENSE_SORT_COLUMNS[column]} {'ASC' if ascending else 'DESC'}")
+    return f" ORDER BY {', '.join(terms)}"
+
+def query_expenses(start_date=None, end_date=None, categories=None, min_amount=None,
+                   max_amount=None, member_id=None, order_by=None, limit=None, offset=None):
+    """
+    Retrieve the expenses matching the given filters with one parameterized query.
+    All filters are optional; see _expense_filter_clause for their meaning.
+    order_by is a column name or a list of (column, ascending) pairs.
+    limit/offset page through the result.
+    Returns a list of tuples in stored form:
+    (id, value_cents, category, description, day, member_id)
+    Use Expense.from_storage_row to turn them into Expense objects.
+    """
+    where, params = _expense_filter_clause(start_date, end_date, categories,
+                                           min_amount, max_amount, member_id)
+    sql = f'SELECT {EXPENSE_COLUMNS} FROM expenses' + where
+    sql += _order_by_clause(order_by)
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+        if offset:
+            sql += " OFFSET ?"
+            params.append(offset)
+    cursor = get_connection().cursor()
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+def get_expense_page(page_size, before=None, after=None, **filters):
+    """
+    One page of expenses, newest first, using keyset pagination on (day, id).
+    before=(day, id) returns the next page of older rows after that key,
+    after=(day, id) returns the page of newer rows just above that key,
+    and with neither the newest page is returned. Each page is an index
+    seek, so its cost depends on page_size rather than on the page's depth.
+    filters are those of query_expenses.
+    Returns a tuple: (rows, has_more) where rows are in stored form ordered
+    newest first, and has_more tells whether rows exist beyond the page in
+    the direction that was requested.
+    """
+    where, params = _expense_filter_clause(**filters)
+    conditions = [where[len(" WHERE "):]] if where else []
+    if after is not None:
+        conditions.append("(day, id) > (?, ?)")
+        params.extend(after)
+        order = "day ASC, id ASC"
+    else:
+        if before is not None:
+            conditions.append("(day, id) < (?, ?)")
+            params.extend(before)
+        order = "day DESC, id DESC"
+    sql = f'SELECT {EXPENSE_COLUMNS} FROM expenses'
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    # Fetch one extra row to learn whether another page exists
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(page_size + 1)
+    cursor = get_connection().cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if after is not None:
+        rows.reverse()
+    return rows, has_more
+
+def iter_expenses(columns=None, batch_size=500, order_by=None, **filters):
+    """
+    Stream expenses in stored form without materializing the whole table.
+    Rows are pulled from the cursor batch_size at a time with fetchmany, so
+    memory stays bounded however many rows match.
+    columns optionally projects a subset of EXPENSE_COLUMNS, e.g. ("day", "value_cents").
+    order_by and filters are those of query_expenses.
+    Yields tuples with the requested columns (all of EXPENSE_COLUMNS by default).
+    """
+    if columns:
+        allowed = EXPENSE_COLUMNS.split(", ")
+        for column in columns:
+            if column not in allowed:
+                raise ValueError(f"Unknown expense column '{column}'")
+        selected = ", ".join(columns)
+    else:
+        selected = EXPENSE_COLUMNS
+    where, params = _expense_filter_clause(**filters)
+    cursor = get_connection().cursor()
+    cursor.execute(f'SELECT {selected} FROM expenses{where}{_order_by_clause(order_by)}', params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+def top_expenses(k, **filters):
+    """
+    The k largest expenses matching the filters of query_expenses, largest first
+    (ties broken by newest id). Without a date range this walks the value index
+    backwards and stops after k rows.
+    Returns a list of tuples in stored form.
+    """
+    return query_expenses(order_by=[("value", False), ("id", False)], limit=k, **filters)
+
+# SQL grouping key for each aggregation level, computed from the day ordinal.
+# Ordinal 1 (0001-01-01) is a Monday, so (day - 1) % 7 is the weekday.
+AGGREGATE_GROUPS = {
+    "day": "day",                                                  # day ordinal
+    "week": "day - (day - 1) % 7",                                 # ordinal of the ISO week's Monday
+    "month": f"strftime('%Y-%m', day + {JULIAN_DAY_OFFSET})",      # 'YYYY-MM'
+    "year": f"strftime('%Y', day + {JULIAN_DAY_OFFSET})",          # 'YYYY'
+    "category": "category",
+    "member": "member_id",
+}
+
+def sum_expenses(**filters):
+    """
+    Total and count of the expenses matching the filters of query_expenses.
+    Returns a tuple: (total_cents, count); total_cents is 0 when nothing matches.
+    """
+    where, params = _expense_filter_clause(**filters)
+    cursor = get_connection().cursor()
+    cursor.execute('SELECT COALESCE(SUM(value_cents), 0), COUNT(*) FROM expenses' + where, params)
+    return cursor.fetchone()
+
+def aggregate_expenses(group_by, **filters):
+    """
+    Sum expenses per group with a single GROUP BY query.
+    group_by is one of AGGREGATE_GROUPS ('day', 'week', 'month', 'year',
+    'category', 'member'); filters are those of query_expenses.
+    Day and week keys are day ordinals, month and year keys are strings.
+    Returns a list of tuples ordered by key: (key, total_cents, count)
+    """
+    if group_by not in AGGREGATE_GROUPS:
+        raise ValueError(f"Cannot aggregate expenses by '{group_by}'")
+    key = AGGREGATE_GROUPS[group_by]
+    where, params = _expense_filter_clause(**filters)
+    cursor = get_connection().cursor()
+    cursor.execute(
+        f'SELECT {key} AS bucket, SUM(value_cents), COUNT(*) FROM expenses{where} '
+        'GROUP BY bucket ORDER BY bucket',
+        params,
+    )
+    return cursor.fetchall()
+
+# -------------------
+# Rollup (Summary) Reads
+# -------------------
+
+# Grouping key for each level when reading the rollup tables.
+# Levels coarser than a day are read from monthly_totals unless a date range
+# is requested, which needs day resolution.
+ROLLUP_GROUPS = {
+    "day": ("daily_totals", "day"),
+    "week": ("daily_totals", "day - (day - 1) % 7"),
+    "month": ("monthly_totals", "month"),
+    "year": ("monthly_totals", "substr(month, 1, 4)"),
+    "category": ("monthly_totals", "category"),
+    "member": ("monthly_totals", "NULLIF(member_key, 0)"),
+}
+
+def _rollup_query(group_by, start_date, end_date, categories, member_id):
+    """
+    Pick the rollup table and grouping key for a request, and build its WHERE clause.
+    Returns (table, key, where_sql, params).
+    """
+    if group_by is not None and group_by not in ROLLUP_GROUPS:
+        raise ValueError(f"Cannot aggregate expenses by '{group_by}'")
+    table, key = ROLLUP_GROUPS[group_by] if group_by else ("monthly_totals", None)
+    conditions = []
+    params = []
+    if start_date is not None or end_date is not None:
+        # Date ranges need day resolution; recompute coarse keys from the day
+        table = "daily_totals"
+        if group_by in ("month", "year"):
+            key = AGGREGATE_GROUPS[group_by]
+        if start_date is not None:
+            conditions.append("day >= ?")
+            params.append(to_day(start_date))
+        if end_date is not None:
+            conditions.append("day <= ?")
+            params.append(to_day(end_date))
+    if categories is not None:
+        categories = list(categories)
+        conditions.append(f"category IN ({', '.join('?' * len(categories))})" if categories else "0")
+        params.extend(categories)
+    if member_id is not None:
+        conditions.append("member_key = ?")
+        params.append(member_id)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return table, key, where, params
+
+def sum_rollups(start_date=None, end_date=None, categories=None, member_id=None):
+    """
+    Total and count of expenses from the rollup tables.
+    Touches only the summary rows inside the date range, however long the history.
+    Returns a tuple: (total_cents, count)
+    """
+    table, _, where, params = _rollup_query(None, start_date, end_date, categories, member_id)
+    cursor = get_connection().cursor()
+    cursor.execute(
+        f'SELECT COALESCE(SUM(total_cents), 0), COALESCE(SUM(expense_count), 0) FROM {table}{where}',
+        params,
+    )
+    return cursor.fetchone()
+
+def aggregate_rollups(group_by, start_date=None, end_date=None, categories=None, member_id=None):
+    """
+    Per-group totals read from the rollup tables; same keys as aggregate_expenses.
+    Returns a list of tuples ordered by key: (key, total_cents, count)
+    """
+    table, key, where, params = _rollup_query(group_by, start_date, end_date, categories, member_id)
+    cursor = get_connection().cursor()
+    cursor.execute(
+        f'SELECT {key} AS bucket, SUM(total_cents), SUM(expense_count) FROM {table}{where} '
+        'GROUP BY bucket ORDER BY bucket',
+        params,
+    )
+    return cursor.fetchall()
+
+def rebuild_rollups():
+    """
+    Recompute daily_totals and monthly_totals from the expenses table.
+    Repairs the summaries if they were ever changed outside the triggers.
+    """
+    with transaction() as conn:
+        for table in ROLLUP_TABLES:
+            for statement in _rollup_rebuild_sql(table):
+                conn.execute(statement)
+
+def top_expenses_by_group(k, group_by, **filters):
+    """
+    Leaderboards: the k largest expenses within each group, in one query.
+    group_by is one of AGGREGATE_GROUPS ('category', 'member', 'week', 'month', ...);
+    filters are those of query_expenses.
+    Returns a list of (key, row) pairs ordered by key, then by value descending,
+    where row is an expense in stored form.
+    """
+    if group_by not in AGGREGATE_GROUPS:
+        raise ValueError(f"Cannot group expenses by '{group_by}'")
+    key = AGGREGATE_GROUPS[group_by]
+    where, params = _expense_filter_clause(**filters)
+    params.append(k)
+    cursor = get_connection().cursor()
+    cursor.execute(f'''
+        SELECT bucket, {EXPENSE_COLUMNS} FROM (
+            SELECT {key} AS bucket, {EXPENSE_COLUMNS},
+                   ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY value_cents DESC, id DESC) AS rank
+            FROM expenses{where}
+        )
+        WHERE rank <= ?
+        ORDER BY bucket, rank
+    ''', params)
+    return [(row[0], row[1:]) for row in cursor.fetchall()]
 
 def update_expense(expense_id, value=None, category=None, description=None, date_str=None, member_id=None):
     """
     Update expense fields selectively.
     Only provided fields are updated.
     """
-    with get_connection() as conn:
+    with transaction() as conn:
         cursor = conn.cursor()
         updates = []
         params = []
         if value is not None:
-            updates.append("value = ?")
-            params.append(value)
+            updates.append("value_cents = ?")
+            params.append(to_cents(value))
         if category is not None:
             updates.append("category = ?")
             params.append(category)
@@ -170,21 +900,137 @@ def update_expense(expense_id, value=None, category=None, description=None, date
             updates.append("description = ?")
             params.append(description)
         if date_str is not None:
-            updates.append("date = ?")
-            params.append(date_str)
+            updates.append("day = ?")
+            params.append(to_day(date_str))
         if member_id is not None:
             updates.append("member_id = ?")
             params.append(member_id)
         params.append(expense_id)
         sql = f"UPDATE expenses SET {', '.join(updates)} WHERE id = ?"
         cursor.execute(sql, params)
-        conn.commit()
 
 def delete_expense(expense_id):
     """
     Delete an expense by id.
     """
-    with get_connection() as conn:
+    with transaction() as conn:
         cursor = conn.cursor()
         cursor.execute('DELETE FROM expenses WHERE id = ?', (expense_id,))
-        conn.commit()
+
+# -------------------------
+# Command Log for Undo/Redo
+# -------------------------
+
+# Commands kept in the log; older entries are dropped as new ones are recorded
+COMMAND_LOG_LIMIT = 100
+
+# Commands that can be recorded: command -> (table, whether it inserted the row)
+COMMANDS = {
+    "add_expense": ("expenses", True),
+    "delete_expense": ("expenses", False),
+    "add_member": ("family_members", True),
+    "delete_member": ("family_members", False),
+}
+
+def _snapshot(conn, table, row_id):
+    # The stored row as a list, plus for a member the ids of its expenses,
+    # which ON DELETE SET NULL would otherwise unlink for good
+    if table == "expenses":
+        row = conn.execute('''
+            SELECT id, value_cents, category, description, day, member_id
+            FROM expenses WHERE id = ?
+        ''', (row_id,)).fetchone()
+        return None if row is None else list(row)
+    row = conn.execute(
+        "SELECT id, name, earning_status, earnings FROM family_members WHERE id = ?", (row_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    expense_ids = [expense_id for (expense_id,) in conn.execute(
+        "SELECT id FROM expenses WHERE member_id = ?", (row_id,))]
+    return list(row) + [expense_ids]
+
+def _restore_row(conn, table, row):
+    # Put a snapshotted row back under its original id; False if the id is taken
+    if table == "expenses":
+        # A member deleted since the snapshot leaves the expense unassigned
+        return conn.execute('''
+            INSERT OR IGNORE INTO expenses (id, value_cents, category, description, day, member_id)
+            VALUES (?, ?, ?, ?, ?, (SELECT id FROM family_members WHERE id = ?))
+        ''', row).rowcount > 0
+    member_id, name, earning_status, earnings, expense_ids = row
+    if not conn.execute('''
+        INSERT OR IGNORE INTO family_members (id, name, earning_status, earnings)
+        VALUES (?, ?, ?, ?)
+    ''', (member_id, name, earning_status, earnings)).rowcount:
+        return False
+    conn.executemany("UPDATE expenses SET member_id = ? WHERE id = ? AND member_id IS NULL",
+                     ((member_id, expense_id) for expense_id in expense_ids))
+    return True
+
+def _apply_command(conn, command, target_id, row, forward):
+    # Redo (forward=True) or undo a logged command by primary key. Returns
+    # False if the row had already been changed outside the log
+    table, inserted = COMMANDS[command]
+    if inserted == forward:
+        return _restore_row(conn, table, row)
+    return conn.execute(f"DELETE FROM {table} WHERE id = ?", (target_id,)).rowcount > 0
+
+def record_command(command, target_id):
+    """
+    Log an undoable command on one row, in the caller's transaction.
+    command is one of COMMANDS. Call it after the insert for add_* commands and
+    before the delete for delete_* commands, so the row can be snapshotted.
+    Recording clears the redo history and trims the log to COMMAND_LOG_LIMIT.
+    """
+    table, _ = COMMANDS[command]
+    with transaction() as conn:
+        row = _snapshot(conn, table, target_id)
+        if row is None:
+            return None
+        conn.execute("DELETE FROM command_log WHERE undone = 1")
+        cursor = conn.execute(
+            "INSERT INTO command_log (command, target_id, row) VALUES (?, ?, ?)",
+            (command, target_id, json.dumps(row)))
+        conn.execute("DELETE FROM command_log WHERE id <= ?", (cursor.lastrowid - COMMAND_LOG_LIMIT,))
+        return cursor.lastrowid
+
+def _step_command(undo):
+    # Undo the newest applied command, or redo the most recently undone one.
+    # The write lock is taken before the log is read, so two sessions stepping
+    # at once queue on busy_timeout instead of one failing with SQLITE_BUSY
+    with transaction(immediate=True) as conn:
+        entry = conn.execute(f'''
+            SELECT id, command, target_id, row FROM command_log
+            WHERE undone = ? ORDER BY id {"DESC" if undo else "ASC"} LIMIT 1
+        ''', (0 if undo else 1,)).fetchone()
+        if entry is None:
+            return None
+        log_id, command, target_id, row = entry
+        row = json.loads(row)
+        applied = _apply_command(conn, command, target_id, row, forward=not undo)
+        conn.execute("UPDATE command_log SET undone = ? WHERE id = ?", (int(undo), log_id))
+        return command, row, applied
+
+def undo_command():
+    """
+    Undo the newest command in the log, in one transaction.
+    Returns (command, row snapshot, applied), or None when there is nothing to
+    undo; applied is False if the row was already gone (or back) anyway.
+    """
+    return _step_command(undo=True)
+
+def redo_command():
+    """
+    Redo the most recently undone command, in one transaction.
+    Returns (command, row snapshot, applied) like undo_command, or None.
+    """
+    return _step_command(undo=False)
+
+def command_log_counts():
+    """
+    Return (undoable, redoable) counts of logged commands.
+    """
+    counts = dict(get_connection().execute(
+        "SELECT undone, COUNT(*) FROM command_log GROUP BY undone").fetchall())
+    return counts.get(0, 0), counts.get(1, 0)
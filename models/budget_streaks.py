@@ -0,0 +1,114 @@
+# budget_streaks.py
+# Implements the budget-streak engine: runs of consecutive days on which total
+# spending stayed at or under a daily limit. Only the sorted list of over-limit
+# days is kept, so an expense landing on a day is an O(log n) update and the
+# current and longest streaks are answered without scanning the history.
+
+import bisect
+import threading
+from datetime import date
+
+class BudgetStreaks:
+    def __init__(self, daily_limit_cents, day_totals=()):
+        """
+        Build the engine from (day, total_cents, count) rows, e.g.
+        db.aggregate_rollups("day"). Days without expenses count as under the
+        limit; streaks start on the first day with an expense.
+        """
+        self.limit = daily_limit_cents
+        self.totals = {}  # day ordinal -> total cents spent that day
+        self.count = 0  # Number of expenses seen, for consistency checks
+        self.lock = threading.RLock()  # Shared between Streamlit sessions
+        for day, total_cents, count in day_totals:
+            self.totals[day] = self.totals.get(day, 0) + total_cents
+            self.count += count
+        self.first_day = min(self.totals) if self.totals else None
+        self.over_days = sorted(day for day, total in self.totals.items() if total > self.limit)
+        self.prefix_longest = {}  # over_days index -> longest run closed before it
+        self._recompute_longest()
+
+    def __len__(self):
+        return self.count
+
+    def _run_before(self, index):
+        # Length of the under-limit run that ends just before over_days[index]
+        previous = self.over_days[index - 1] if index > 0 else self.first_day - 1
+        return self.over_days[index] - previous - 1
+
+    def _recompute_longest(self):
+        # Longest run closed off by an over-limit day; O(number of over-limit days)
+        self.longest_closed = max((self._run_before(i) for i in range(len(self.over_days))), default=0)
+
+    def _longest_closed_before(self, index):
+        # Longest run closed off by one of the first index over-limit days. Only
+        # needed when expenses are dated in the future; memoized until the next add
+        if index == len(self.over_days):
+            return self.longest_closed
+        if index not in self.prefix_longest:
+            self.prefix_longest[index] = max((self._run_before(i) for i in range(index)), default=0)
+        return self.prefix_longest[index]
+
+    def add(self, day, value_cents, count=1):
+        """
+        Apply an expense of value_cents on day (a day ordinal); pass a negative
+        value and count=-1 to take a deleted expense back out.
+        """
+        with self.lock:
+            self.prefix_longest.clear()
+            self.count += count
+            was_over = self.totals.get(day, 0) > self.limit
+            total = self.totals[day] = self.totals.get(day, 0) + value_cents
+            if self.first_day is None or day < self.first_day:
+                # Streaks now start earlier; the leading run changes
+                self.first_day = day
+                self._set_over(day, total > self.limit, was_over)
+                self._recompute_longest()
+                return
+            self._set_over(day, total > self.limit, was_over)
+
+    def _set_over(self, day, is_over, was_over):
+        # Insert or remove day from over_days, keeping longest_closed current
+        if is_over == was_over:
+            return
+        index = bisect.bisect_left(self.over_days, day)
+        if is_over:
+            # day splits one run in two; only a split of the longest needs a rescan
+            is_last = index == len(self.over_days)
+            split = None if is_last else self._run_before(index)
+            self.over_days.insert(index, day)
+            if is_last:
+                self.longest_closed = max(self.longest_closed, self._run_before(index))
+            elif split == self.longest_closed:
+                self._recompute_longest()
+        else:
+            # Removing day merges the runs on either side of it
+            run_before = self._run_before(index)
+            del self.over_days[index]
+            if index < len(self.over_days):
+                self.longest_closed = max(self.longest_closed, self._run_before(index))
+            elif run_before == self.longest_closed:
+                self._recompute_longest()
+
+    def current(self, today=None):
+        # Consecutive under-limit days ending today (0 if today is over the limit)
+        today = (today or date.today()).toordinal()
+        with self.lock:
+            if self.first_day is None or today < self.first_day:
+                return 0
+            if self.over_days and self.over_days[-1] > today:
+                # Expenses dated in the future; find the last over-limit day so far
+                index = bisect.bisect_right(self.over_days, today)
+            else:
+                index = len(self.over_days)
+            previous = self.over_days[index - 1] if index > 0 else self.first_day - 1
+            return today - previous
+
+    def longest(self, today=None):
+        # Longest run of consecutive under-limit days up to today; runs closed by
+        # over-limit days after today (future-dated expenses) don't count
+        today = today or date.today()
+        with self.lock:
+            if self.first_day is None or today.toordinal() < self.first_day:
+                return 0
+            index = bisect.bisect_right(self.over_days, today.toordinal())
+            return max(self._longest_closed_before(index), self.current(today))
@@ -0,0 +1,112 @@
+# date_index.py
+# Implements a date-ordered index of expense totals using Fenwick (binary indexed)
+# trees, so the total and count over any date range are O(log n) and each
+# added or deleted expense is an O(log n) point update.
+
+import threading
+from datetime import date
+from utils.conversions import to_day
+
+# Free days kept past the newest expense so new entries rarely force a resize
+SPAN_HEADROOM = 366
+
+class DateRangeIndex:
+    def __init__(self, day_totals=()):
+        """
+        Build the index from (day, total_cents, count) rows, e.g.
+        db.aggregate_rollups("day"), with days as day ordinals.
+        """
+        self.lock = threading.RLock()  # Shared between Streamlit sessions
+        day_totals = list(day_totals)
+        if day_totals:
+            first_day = min(row[0] for row in day_totals)
+            last_day = max(row[0] for row in day_totals)
+        else:
+            first_day = last_day = date.today().toordinal()
+        self._allocate(first_day, last_day - first_day + 1 + SPAN_HEADROOM, day_totals)
+
+    def _allocate(self, first_day, size, day_totals):
+        # Lay out both trees over [first_day, first_day + size) in linear time
+        self.first_day = first_day
+        self.size = size
+        self.cents = [0] * (size + 1)  # 1-based Fenwick arrays
+        self.counts = [0] * (size + 1)
+        for day, total_cents, count in day_totals:
+            self.cents[day - first_day + 1] += total_cents
+            self.counts[day - first_day + 1] += count
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                self.cents[parent] += self.cents[i]
+                self.counts[parent] += self.counts[i]
+
+    def _day_totals(self):
+        # Recover the non-empty (day, total_cents, count) points from the trees
+        points = []
+        previous = (0, 0)
+        for position in range(1, self.size + 1):
+            current = self._prefix(position)
+            if current != previous:
+                points.append((self.first_day + position - 1,
+                               current[0] - previous[0], current[1] - previous[1]))
+            previous = current
+        return points
+
+    def _grow_to(self, day):
+        # Re-lay the trees so they cover day, with headroom on that side
+        first_day = day - SPAN_HEADROOM if day < self.first_day else self.first_day
+        last_day = max(self.first_day + self.size - 1, day + SPAN_HEADROOM)
+        self._allocate(first_day, last_day - first_day + 1, self._day_totals())
+
+    def _prefix(self, position):
+        # (total_cents, count) of positions 1..position
+        total_cents = count = 0
+        while position > 0:
+            total_cents += self.cents[position]
+            count += self.counts[position]
+            position -= position & -position
+        return total_cents, count
+
+    def __len__(self):
+        # Number of indexed expenses
+        with self.lock:
+            return self._prefix(self.size)[1]
+
+    def add(self, day, value_cents, count=1):
+        # Record an expense of value_cents on day (a date, ISO string or ordinal)
+        day = to_day(day)
+        with self.lock:
+            if not self.first_day <= day < self.first_day + self.size:
+                self._grow_to(day)
+            position = day - self.first_day + 1
+            while position <= self.size:
+                self.cents[position] += value_cents
+                self.counts[position] += count
+                position += position & -position
+
+    def remove(self, day, value_cents):
+        # Forget an expense previously added with the same day and value
+        self.add(day, -value_cents, -1)
+
+    def totals(self, start_date=None, end_date=None):
+        """
+        Total and count of expenses dated between start_date and end_date,
+        both inclusive; None leaves that side of the range open.
+        Returns a tuple: (total_cents, count)
+        """
+        with self.lock:
+            start = 1 if start_date is None else max(1, to_day(start_date) - self.first_day + 1)
+            end = self.size if end_date is None else min(self.size, to_day(end_date) - self.first_day + 1)
+            if end < start:
+                return 0, 0
+            high_cents, high_count = self._prefix(end)
+            low_cents, low_count = self._prefix(start - 1)
+        return high_cents - low_cents, high_count - low_count
+
+    def sum(self, start_date=None, end_date=None):
+        # Total value in cents between the two dates, inclusive
+        return self.totals(start_date, end_date)[0]
+
+    def count(self, start_date=None, end_date=None):
+        # Number of expenses between the two dates, inclusive
+        return self.totals(start_date, end_date)[1]
@@ -2,9 +2,14 @@
 # This file defines the Expense class, which stores information about a single expense,
 # including its value, category, description, date, and database ID.
 
-from datetime import datetime
+from datetime import date as date_type, datetime
+from utils.conversions import from_cents, from_day
 
 class Expense:
+    # Fixed attribute slots instead of a per-instance __dict__: expenses are
+    # built by the thousand per rerun, so this keeps each one small
+    __slots__ = ("value", "category", "description", "date", "id")
+
     def __init__(self, value, category, description, date, id=None):
         """
         Initialize an Expense object.
@@ -53,3 +58,46 @@ class Expense:
             date = date_str
 
         return cls(value, category, description, date, id=expense_id)
+
+    @classmethod
+    def from_storage_row(cls, row):
+        """
+        Factory method to create an Expense object from a row in stored form,
+        as returned by db.query_expenses.
+
+        Args:
+            row (tuple): (id, value_cents, category, description, day, member_id)
+                         where value_cents is integer cents and day a day ordinal.
+
+        Returns:
+            Expense: An instantiated Expense object with value in currency
+                     units and date as a datetime.date.
+        """
+        return cls(from_cents(row[1]), row[2], row[3], from_day(row[4]), id=row[0])
+
+    @classmethod
+    def from_storage_rows(cls, rows):
+        """
+        Batch factory: build Expense objects from an iterable of stored rows
+        (a cursor, a fetchmany batch or a db.iter_expenses stream).
+
+        The conversions of from_storage_row are inlined and the attributes set
+        directly on a bare instance, so each row costs no factory, __init__ or
+        converter calls.
+
+        Returns:
+            list: Expense objects in row order.
+        """
+        new = object.__new__
+        fromordinal = date_type.fromordinal
+        expenses = []
+        append = expenses.append
+        for expense_id, value_cents, category, description, day, _ in rows:
+            expense = new(cls)
+            expense.value = value_cents / 100
+            expense.category = category
+            expense.description = description
+            expense.date = fromordinal(day)
+            expense.id = expense_id
+            append(expense)
+        return expenses
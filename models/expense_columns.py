@@ -0,0 +1,156 @@
+# expense_columns.py
+# Implements a columnar, NumPy-backed copy of the expenses table for analytics.
+# Each field lives in its own array, so group-by, range sums and histograms
+# run as vectorized operations instead of Python loops over row tuples.
+
+import numpy as np
+import db
+from utils.conversions import from_cents, to_cents, to_day
+
+# One record per expense; member_id 0 stands for "unassigned" like the rollup member_key
+COLUMN_DTYPE = np.dtype([
+    ("id", np.int64),
+    ("value_cents", np.int64),
+    ("day", np.int64),
+    ("category", np.int32),
+    ("member_id", np.int64),
+])
+
+# Day ordinal of 1970-01-01, the epoch of numpy's datetime64
+_EPOCH_DAY = 719163
+
+class ExpenseColumns:
+    def __init__(self, records, categories):
+        """
+        Wrap a structured array of COLUMN_DTYPE records, sorted by (day, id).
+
+        Args:
+            records (numpy.ndarray): One record per expense.
+            categories (list): Category names; records store an index into this list.
+        """
+        self.ids = records["id"]
+        self.value_cents = records["value_cents"]
+        self.days = records["day"]
+        self.category_codes = records["category"]
+        self.member_ids = records["member_id"]
+        self.categories = categories
+        self._prefix_cents = None  # Cumulative value sums by position, built on first range sum
+
+    @classmethod
+    def from_db(cls, **filters):
+        """
+        Load expenses in one sequential read, ordered by day and id.
+        filters are those of db.query_expenses. Categories are dictionary-encoded
+        while the rows stream in, so no list of row tuples is ever built.
+        """
+        codes = {}
+
+        def numeric(rows):
+            for expense_id, value_cents, day, category, member_id in rows:
+                code = codes.get(category)
+                if code is None:
+                    code = codes[category] = len(codes)
+                yield expense_id, value_cents, day, code, member_id or 0
+
+        rows = db.iter_expenses(columns=("id", "value_cents", "day", "category", "member_id"),
+                                batch_size=10000, order_by=[("date", True), ("id", True)], **filters)
+        records = np.fromiter(numeric(rows), dtype=COLUMN_DTYPE)
+        return cls(records, list(codes))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def mask(self, start_date=None, end_date=None, categories=None,
+             min_amount=None, max_amount=None, member_id=None):
+        # Boolean selection with the same semantics as db.query_expenses filters
+        selected = np.ones(len(self), dtype=bool)
+        if start_date is not None:
+            selected &= self.days >= to_day(start_date)
+        if end_date is not None:
+            selected &= self.days <= to_day(end_date)
+        if categories is not None:
+            # An empty list selects nothing, as in db._expense_filter_clause
+            codes = [self.categories.index(c) for c in categories if c in self.categories]
+            selected &= np.isin(self.category_codes, codes)
+        if min_amount is not None:
+            selected &= self.value_cents >= to_cents(min_amount)
+        if max_amount is not None:
+            selected &= self.value_cents <= to_cents(max_amount)
+        if member_id is not None:
+            selected &= self.member_ids == member_id
+        return selected
+
+    def range_sum(self, start_date=None, end_date=None):
+        """
+        Total and count of expenses dated between start_date and end_date (inclusive).
+        Days are sorted, so this is two binary searches into a prefix-sum array.
+        Returns a tuple: (total_cents, count)
+        """
+        if self._prefix_cents is None:
+            self._prefix_cents = np.concatenate(([0], np.cumsum(self.value_cents)))
+        lo = 0 if start_date is None else int(np.searchsorted(self.days, to_day(start_date), "left"))
+        hi = len(self) if end_date is None else int(np.searchsorted(self.days, to_day(end_date), "right"))
+        if hi <= lo:
+            return 0, 0
+        return int(self._prefix_cents[hi] - self._prefix_cents[lo]), hi - lo
+
+    def sum(self, **filters):
+        # Total and count of the expenses matching the filters: (total_cents, count)
+        selected = self.mask(**filters)
+        return int(self.value_cents[selected].sum()), int(selected.sum())
+
+    def _group_keys(self, group_by):
+        # Per-expense grouping key array for one of db.AGGREGATE_GROUPS
+        if group_by == "day":
+            return self.days
+        if group_by == "week":
+            # Ordinal 1 is a Monday, matching the SQL week key
+            return self.days - (self.days - 1) % 7
+        if group_by == "month":
+            return (self.days - _EPOCH_DAY).astype("datetime64[D]").astype("datetime64[M]")
+        if group_by == "category":
+            return self.category_codes
+        if group_by == "member":
+            return self.member_ids
+        raise ValueError(f"Cannot aggregate expenses by '{group_by}'")
+
+    def group_by(self, group_by, **filters):
+        """
+        Totals per group, like db.aggregate_expenses: a list of
+        (key, total_cents, count) ordered by key. Keys are day ordinals for
+        'day' and 'week', 'YYYY-MM' for 'month', names for 'category' and
+        member ids (None when unassigned) for 'member'.
+        """
+        keys = self._group_keys(group_by)
+        values = self.value_cents
+        if filters:
+            selected = self.mask(**filters)
+            keys, values = keys[selected], values[selected]
+        unique, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=values, minlength=len(unique))
+        counts = np.bincount(inverse, minlength=len(unique))
+        if group_by == "month":
+            labels = [str(month) for month in unique]
+        elif group_by == "category":
+            labels = [self.categories[code] for code in unique]
+        elif group_by == "member":
+            labels = [int(member) or None for member in unique]
+        else:
+            labels = [int(key) for key in unique]
+        # bincount sums in float64, exact for any realistic cents total
+        groups = [(label, int(round(total)), int(count))
+                  for label, total, count in zip(labels, totals, counts)]
+        if group_by == "category":
+            groups.sort()  # Codes follow first appearance, not name order
+        return groups
+
+    def histogram(self, bins=10, **filters):
+        """
+        Distribution of expense values. bins is a count or a sequence of edges
+        in currency units. Returns (counts, edges) with edges in currency units.
+        """
+        values = self.value_cents[self.mask(**filters)] if filters else self.value_cents
+        if not np.isscalar(bins):
+            bins = [to_cents(edge) for edge in bins]
+        counts, edges = np.histogram(values, bins=bins)
+        return counts.tolist(), [from_cents(edge) for edge in edges.tolist()]
@@ -0,0 +1,64 @@
+# expense_sorter.py
+# Implements multi-key sorting of an in-memory list of expenses.
+# Sort keys are computed once per field and sorted orders are remembered per
+# sort specification, so switching between sort options does not re-sort.
+
+# UI sort option -> (key of an Expense, db.EXPENSE_SORT_COLUMNS name)
+SORT_OPTIONS = {
+    "Date": (lambda e: e.date, "date"),
+    "Amount": (lambda e: e.value, "value"),
+    "Category": (lambda e: e.category.lower(), "category"),
+}
+
+def sort_spec(sort_option, ascending=True):
+    """
+    Normalize a sort request to a tuple of (option, ascending) pairs.
+    sort_option is one option name from SORT_OPTIONS, or a list of names
+    and/or (name, ascending) pairs, e.g. [("Category", True), ("Amount", False)].
+    Unknown option names fall back to 'Date'.
+    """
+    if isinstance(sort_option, str):
+        sort_option = [(sort_option, ascending)]
+    spec = []
+    for term in sort_option:
+        option, term_ascending = (term, ascending) if isinstance(term, str) else term
+        spec.append((option if option in SORT_OPTIONS else "Date", bool(term_ascending)))
+    return tuple(spec)
+
+class ExpenseSorter:
+    def __init__(self, expenses):
+        """
+        Wrap a list of Expense objects for repeated sorting.
+        Ties on every requested key are broken by ascending id, so the
+        result does not depend on the order the expenses came in.
+        """
+        self.expenses = expenses
+        self.keys = {}  # option -> list of precomputed keys, one per expense
+        self.orders = {}  # sort spec -> list of positions in sorted order
+        # Base order for tie-breaks: by id, expenses without one last
+        self.by_id = sorted(range(len(expenses)),
+                            key=lambda i: (expenses[i].id is None, expenses[i].id or 0))
+
+    def _keys_for(self, option):
+        # Compute the option's key for every expense once (e.g. category.lower())
+        keys = self.keys.get(option)
+        if keys is None:
+            key_func = SORT_OPTIONS[option][0]
+            keys = self.keys[option] = [key_func(expense) for expense in self.expenses]
+        return keys
+
+    def order(self, spec):
+        # Positions of the expenses in spec order (see sort_spec), computed once per spec
+        order = self.orders.get(spec)
+        if order is None:
+            order = list(self.by_id)
+            # Stable sorts from the least to the most significant key
+            for option, ascending in reversed(spec):
+                order.sort(key=self._keys_for(option).__getitem__, reverse=not ascending)
+            self.orders[spec] = order
+        return order
+
+    def sorted(self, sort_option, ascending=True):
+        # The expenses as a new list, sorted as requested
+        expenses = self.expenses
+        return [expenses[i] for i in self.order(sort_spec(sort_option, ascending))]
@@ -3,6 +3,9 @@
 # and includes their name, earning status, income amount, and database ID.
 
 class FamilyMember:
+    # Fixed attribute slots instead of a per-instance __dict__
+    __slots__ = ("name", "earning_status", "earnings", "id")
+
     def __init__(self, name, earning_status=True, earnings=0, id=None):
         """
         Initialize a FamilyMember object.
@@ -50,4 +53,25 @@ class FamilyMember:
         earning_status = bool(row[2])
         earnings = row[3]
 
-        return cls(name, earning_status, earnings, id=member_id)
\ No newline at end of file
+        return cls(name, earning_status, earnings, id=member_id)
+
+    @classmethod
+    def from_db_rows(cls, rows):
+        """
+        Batch factory: build FamilyMember objects from an iterable of database
+        rows (e.g. a cursor or db.get_family_members()) without a factory call per row.
+
+        Returns:
+            list: FamilyMember instances in row order.
+        """
+        new = object.__new__
+        members = []
+        append = members.append
+        for member_id, name, earning_status, earnings in rows:
+            member = new(cls)
+            member.name = name
+            member.earning_status = bool(earning_status)
+            member.earnings = earnings
+            member.id = member_id
+            append(member)
+        return members
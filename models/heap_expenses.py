@@ -1,32 +1,124 @@
 # heap_expenses.py
 # Implements a max-heap structure to efficiently track and retrieve top expenses.
+# The heap is kept live: expenses are pushed as they are added and removed
+# lazily by id, so it never has to be rebuilt from the database on every read.
 
 import heapq
 import itertools
+import threading
 
 class ExpenseHeap:
     def __init__(self):
         self.heap = []
         self.counter = itertools.count()  # Unique sequence count for tie breaking
+        self.entry_of = {}  # expense id -> count of its live heap entry
+        self.anonymous = 0  # Live entries for expenses without an id (cannot be removed)
+        self.lock = threading.RLock()  # Shared between Streamlit sessions
+
+    def __len__(self):
+        # Number of live expenses, not counting lazily removed entries
+        return len(self.entry_of) + self.anonymous
+
+    def _is_live(self, entry):
+        # An entry is stale once its expense was removed or pushed again
+        expense_id = entry[2].id
+        return expense_id is None or self.entry_of.get(expense_id) == entry[1]
+
+    def _discard_stale_top(self):
+        # Drop removed entries sitting at the top so heap[0] is live
+        while self.heap and not self._is_live(self.heap[0]):
+            heapq.heappop(self.heap)
+
+    def _compact(self):
+        # Rebuild without stale entries once they make up most of the heap
+        if len(self.heap) > 2 * len(self) + 32:
+            self.heap = [entry for entry in self.heap if self._is_live(entry)]
+            heapq.heapify(self.heap)
 
     def push(self, expense):
         # Push a tuple of (-value, unique count, expense) to create a max heap
-        count = next(self.counter)
-        heapq.heappush(self.heap, (-expense.value, count, expense))
+        with self.lock:
+            count = next(self.counter)
+            if expense.id is None:
+                self.anonymous += 1
+            else:
+                # Pushing an id again supersedes its old entry
+                self.entry_of[expense.id] = count
+            heapq.heappush(self.heap, (-expense.value, count, expense))
+
+    def remove(self, expense_id):
+        # Lazily remove the expense with this id; its entry is skipped from now on
+        with self.lock:
+            if self.entry_of.pop(expense_id, None) is not None:
+                self._discard_stale_top()
+                self._compact()
 
     def pop(self):
         # Pop the largest expense with highest value
-        if self.heap:
-            return heapq.heappop(self.heap)[2]  # Return the expense object
-        return None
+        with self.lock:
+            self._discard_stale_top()
+            if self.heap:
+                entry = heapq.heappop(self.heap)
+                if entry[2].id is None:
+                    self.anonymous -= 1
+                else:
+                    del self.entry_of[entry[2].id]
+                return entry[2]  # Return the expense object
+            return None
 
     def peek(self):
         # Peek at the largest expense without popping
-        if self.heap:
-            return self.heap[0][2]
-        return None
+        with self.lock:
+            self._discard_stale_top()
+            if self.heap:
+                return self.heap[0][2]
+            return None
 
     def get_top_n(self, n):
-        # Get top n expenses without modifying the heap
-        # Sort by the negative value only
-        return [item[2] for item in heapq.nsmallest(n, self.heap, key=lambda x: x[0])]
+        # Get top n expenses without modifying the heap.
+        # Walks the heap tree best-first from the root, so only the entries
+        # above the n-th largest are visited: O(n log n), independent of heap size.
+        with self.lock:
+            top = []
+            if n <= 0 or not self.heap:
+                return top
+            frontier = [(self.heap[0], 0)]
+            while frontier and len(top) < n:
+                entry, index = heapq.heappop(frontier)
+                if self._is_live(entry):
+                    top.append(entry[2])
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < len(self.heap):
+                        heapq.heappush(frontier, (self.heap[child], child))
+            return top
+
+class BoundedTopK:
+    """
+    Keeps the k largest expenses seen so far in a k-sized min-heap.
+    Used when expenses are streamed or already filtered in memory: each push
+    is O(log k) and memory stays O(k) however many expenses pass through.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+        self.counter = itertools.count()  # On equal values the earliest pushed is dropped first
+
+    def push(self, expense):
+        if self.k <= 0:
+            return
+        entry = (expense.value, next(self.counter), expense)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            # Replace the smallest of the current top k
+            heapq.heapreplace(self.heap, entry)
+
+    def extend(self, expenses):
+        for expense in expenses:
+            self.push(expense)
+        return self
+
+    def results(self):
+        # The kept expenses, largest first
+        return [entry[2] for entry in sorted(self.heap, reverse=True)]
@@ -0,0 +1,65 @@
+# query_cache.py
+# Implements a size-bounded LRU cache for tracker query results, invalidated
+# as a whole whenever the database's write generation moves on.
+
+import threading
+from collections import OrderedDict
+
+class QueryCache:
+    def __init__(self, maxsize=128):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): Most results kept; the least recently used is evicted first.
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # key -> result, oldest first
+        self.generation = None  # Write generation the entries were computed at
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_or_compute(self, key, generation, compute, current_generation=None):
+        """
+        Return the cached result for key, or call compute() and cache it.
+        Every entry is dropped once generation differs from the one the
+        cached results were computed at. If current_generation is given, it
+        is called after compute() and the result is only cached when it still
+        returns generation, i.e. no write landed while computing.
+        """
+        with self.lock:
+            if generation != self.generation:
+                self.entries.clear()
+                self.generation = generation
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+        result = compute()
+        if current_generation is not None and current_generation() != generation:
+            return result  # A write landed while computing; the result may be stale
+        with self.lock:
+            if generation == self.generation:
+                self.entries[key] = result
+                if len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        # Drop every entry and reset the counters
+        with self.lock:
+            self.entries.clear()
+            self.generation = None
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        # Hit/miss counters and current size, e.g. for a debug panel
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self.entries), "maxsize": self.maxsize}
@@ -0,0 +1,80 @@
+# rank_index.py
+# Implements an order-statistic index over expense values, answering rank,
+# percentile, k-th largest and range-count questions with binary search
+# instead of a scan over every expense.
+
+import bisect
+import threading
+from utils.conversions import from_cents, to_cents
+
+# Sorts after every real id, so (value, _AFTER_ALL_IDS) bounds all keys with that value
+_AFTER_ALL_IDS = float("inf")
+
+class ExpenseRankIndex:
+    def __init__(self, expenses=()):
+        """
+        Build the index from an iterable of Expense objects (each needs an id).
+        Keys are (value in cents, id) kept in a sorted list, so every query is
+        a bisect: O(log n). Inserts and removals are a bisect plus a list shift.
+        """
+        self.keys = sorted((to_cents(expense.value), expense.id) for expense in expenses)
+        self.key_of = {expense_id: (cents, expense_id) for cents, expense_id in self.keys}
+        self.lock = threading.RLock()  # Shared between Streamlit sessions
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, expense):
+        # Insert an expense; adding an id again replaces its old value
+        with self.lock:
+            self.remove(expense.id)
+            key = (to_cents(expense.value), expense.id)
+            bisect.insort(self.keys, key)
+            self.key_of[expense.id] = key
+
+    def remove(self, expense_id):
+        # Remove an expense by id; unknown ids are ignored
+        with self.lock:
+            key = self.key_of.pop(expense_id, None)
+            if key is not None:
+                del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def _count_at_most(self, cents):
+        # Number of expenses with value <= cents
+        return bisect.bisect_right(self.keys, (cents, _AFTER_ALL_IDS))
+
+    def _count_below(self, cents):
+        # Number of expenses with value < cents
+        return bisect.bisect_left(self.keys, (cents,))
+
+    def rank(self, expense):
+        # 1-based rank by value, largest first; equal values share a rank
+        with self.lock:
+            return len(self.keys) - self._count_at_most(to_cents(expense.value)) + 1
+
+    def percentile(self, value):
+        # Percentage of expenses with a value at or below this one (0-100)
+        with self.lock:
+            if not self.keys:
+                return 0.0
+            return 100.0 * self._count_at_most(to_cents(value)) / len(self.keys)
+
+    def top_percent(self, value):
+        # Percentage of expenses at least this large, e.g. 3.0 for "top 3%"
+        with self.lock:
+            if not self.keys:
+                return 0.0
+            return 100.0 * (len(self.keys) - self._count_below(to_cents(value))) / len(self.keys)
+
+    def kth_largest(self, k):
+        # (value, expense id) of the k-th largest expense (k starts at 1), or None
+        with self.lock:
+            if not 1 <= k <= len(self.keys):
+                return None
+            cents, expense_id = self.keys[-k]
+            return from_cents(cents), expense_id
+
+    def count_between(self, lo, hi):
+        # Number of expenses with lo <= value <= hi
+        with self.lock:
+            return max(0, self._count_at_most(to_cents(hi)) - self._count_below(to_cents(lo)))
@@ -3,144 +3,549 @@
 # and expenses, and provides methods to add, update, delete, and calculate totals.
 
 import db 
+import functools
+import threading
+from collections import OrderedDict
 from models.expense import Expense
-from collections import defaultdict
-from datetime import datetime, timedelta
-from models.heap_expenses import ExpenseHeap
+from models.expense_columns import ExpenseColumns
+from models.expense_sorter import SORT_OPTIONS, ExpenseSorter, sort_spec
+from contextlib import contextmanager
+from datetime import date as date_type, datetime, timedelta
+from models.heap_expenses import BoundedTopK, ExpenseHeap
+from models.budget_streaks import BudgetStreaks
+from models.date_index import DateRangeIndex
+from models.query_cache import QueryCache
+from models.rank_index import ExpenseRankIndex
+from utils.conversions import from_cents, from_day, to_cents, to_day
+from utils.timeseries import MAX_CHART_POINTS, bucket_totals, choose_bucket
+from utils.validation import validate_expense_rows
+
+def _cached(method):
+    # Memoize a read-only tracker query in the tracker's QueryCache, keyed on the
+    # method and its arguments and invalidated by db.data_generation(). Calls with
+    # unhashable arguments, with an explicit column store, or made inside an
+    # open transaction (whose writes may still be rolled back) are not cached.
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        if kwargs.get("columns") is not None or any(isinstance(arg, ExpenseColumns) for arg in args):
+            return method(self, *args, **kwargs)
+        if db.in_transaction():
+            return method(self, *args, **kwargs)
+        return self.query_cache.get_or_compute(
+            key, db.data_generation(), lambda: method(self, *args, **kwargs),
+            current_generation=db.data_generation)
+    return wrapper
 
 class FamilyExpenseTracker:
+    # Heap structure to efficiently get top expenses. It is built once per
+    # process, shared by every tracker (one per Streamlit session), and kept
+    # current in place by the add/delete methods below.
+    _shared_heap = None
+    _heap_lock = threading.Lock()
+    # Order-statistic indexes over expense values, keyed by year (None for all
+    # time). Built on first use and maintained alongside the heap.
+    _rank_indexes = {}
+    # Fenwick-tree index of daily totals for O(log n) date-range sums, built
+    # from the daily rollup on first use and maintained alongside the heap
+    _date_index = None
+    # Budget-streak engines keyed by daily limit in cents, maintained the same way.
+    # Least recently used first; only MAX_STREAK_ENGINES limits are kept, since
+    # every write updates each engine
+    _streak_engines = OrderedDict()
+    MAX_STREAK_ENGINES = 4
+    # db.data_generation() at which the structures above are known to match the
+    # database. Any other commit moves the generation on, and the next read
+    # drops them all; commits made through the tracker update them in place
+    # and advance this instead (see _live_write)
+    _indexes_generation = None
+
     def __init__(self):
         self.db = db 
-        self.expense_heap = ExpenseHeap()  # Heap structure to efficiently get top expenses
+        # Per-session memo of aggregate query results; callers must not mutate them
+        self.query_cache = QueryCache()
+
+    def _sync_live_indexes(self):
+        # Drop the shared heap and indexes if anything committed since they were
+        # last known current: other sessions' raw SQL, other processes, updates
+        generation = db.data_generation()
+        if FamilyExpenseTracker._indexes_generation != generation:
+            with FamilyExpenseTracker._heap_lock:
+                if FamilyExpenseTracker._indexes_generation != generation:
+                    self._invalidate_live_indexes()
+                    FamilyExpenseTracker._indexes_generation = generation
+
+    @contextmanager
+    def _live_write(self):
+        """
+        Wrap a tracker write that updates the live indexes in place. If they
+        were current before it and its commit is the only one since, they are
+        still current after it; otherwise the next read rebuilds them.
+        Inside batch() the enclosing batch accounts for the single commit.
+        """
+        if db.in_transaction():
+            yield
+            return
+        before = db.data_generation()
+        yield
+        after = db.data_generation()
+        with FamilyExpenseTracker._heap_lock:
+            if after == before + 1 and FamilyExpenseTracker._indexes_generation == before:
+                FamilyExpenseTracker._indexes_generation = after
+
+    @property
+    def expense_heap(self):
+        # Build the shared heap on first use, or after writes that bypassed the tracker
+        self._sync_live_indexes()
+        if FamilyExpenseTracker._shared_heap is None:
+            with FamilyExpenseTracker._heap_lock:
+                if FamilyExpenseTracker._shared_heap is None:
+                    FamilyExpenseTracker._shared_heap = self._build_expense_heap()
+        return FamilyExpenseTracker._shared_heap
+
+    def _invalidate_live_indexes(self):
+        # Drop the shared heap and indexes; the next read rebuilds them from the database
+        FamilyExpenseTracker._shared_heap = None
+        FamilyExpenseTracker._rank_indexes = {}
+        FamilyExpenseTracker._date_index = None
+        FamilyExpenseTracker._streak_engines = OrderedDict()
 
-    def add_family_member(self, name, earning_status=True, earnings=0):
+    @property
+    def date_index(self):
+        # The shared date-range index, (re)built from the daily rollup when missing
+        # or after writes that bypassed the tracker
+        self._sync_live_indexes()
+        index = FamilyExpenseTracker._date_index
+        if index is None:
+            index = DateRangeIndex(db.aggregate_rollups("day"))
+            with FamilyExpenseTracker._heap_lock:
+                FamilyExpenseTracker._date_index = index
+        return index
+
+    def add_family_member(self, name, earning_status=True, earnings=0, undoable=False):
         # Validate that name is not empty
         if not name.strip():
             raise ValueError("Name field cannot be empty")
         # Add new family member to the database where it stores earning_status as integer
-        db.add_family_member(name, earning_status, earnings)
+        with self._live_write(), db.transaction():
+            member_id = db.add_family_member(name, earning_status, earnings)
+            if undoable:
+                db.record_command("add_member", member_id)
+        return member_id
+
+    def add_family_members(self, members):
+        # Validate every (name, earning_status, earnings) tuple first, then insert them all in one commit
+        members = list(members)
+        for name, _, _ in members:
+            if not name.strip():
+                raise ValueError("Name field cannot be empty")
+        return db.add_family_members_bulk(members)
 
-    def delete_family_member(self, member):
+    def delete_family_member(self, member, undoable=False):
         # Delete a family member by their database ID
-        db.delete_family_member(member.id)
+        with self._live_write(), db.transaction():
+            if undoable:
+                db.record_command("delete_member", member.id)
+            db.delete_family_member(member.id)
 
     def update_family_member(self, member, earning_status=True, earnings=0):
         # Update member data in the database, only for provided fields
-        db.update_family_member(member.id, earning_status=earning_status, earnings=earnings)
+        with self._live_write():
+            db.update_family_member(member.id, earning_status=earning_status, earnings=earnings)
 
+    @_cached
     def calculate_total_earnings(self):
         # Fetch all members from the database
         members = db.get_family_members()
         # Sum earnings for members marked as earning (earning_status == True)
         return sum(member[3] for member in members if member[2])  # member[3]=earnings, member[2]=earning_status boolean
 
-    def add_expense(self, value, category, description, date):
+    def _prepare_expense(self, value, category, description, date):
         # Validate input values
         if value == 0:
             raise ValueError("Value cannot be zero")
         if not category.strip():
             raise ValueError("Please choose a category")
-        # Convert date object to ISO format string for storage
-        date_str = date.isoformat() if isinstance(date, datetime) else date
-        # Insert new expense into the database
-        db.add_expense(value, category, description, date_str)
+        # Convert the date (date object or ISO string) to its stored day ordinal
+        return value, category, description, to_day(date)
+
+    def add_expense(self, value, category, description, date, undoable=False):
+        # Insert new expense into the database; undoable also logs it for undo()
+        value, category, description, day = self._prepare_expense(value, category, description, date)
+        with self._live_write():
+            with db.transaction():
+                expense_id = db.add_expense(value, category, description, day)
+                if undoable:
+                    db.record_command("add_expense", expense_id)
+            self._index_added(Expense(value, category, description, from_day(day), id=expense_id))
+        return expense_id
+
+    def _index_added(self, expense):
+        # Keep the shared heap and in-memory indexes current instead of rebuilding them
+        day = to_day(expense.date)
+        value = expense.value
+        if FamilyExpenseTracker._shared_heap is not None:
+            FamilyExpenseTracker._shared_heap.push(expense)
+        for year, index in list(FamilyExpenseTracker._rank_indexes.items()):
+            if year is None or year == expense.date.year:
+                index.add(expense)
+        if FamilyExpenseTracker._date_index is not None:
+            FamilyExpenseTracker._date_index.add(day, to_cents(value))
+        for engine in list(FamilyExpenseTracker._streak_engines.values()):
+            engine.add(day, to_cents(value))
+
+    def add_expenses(self, expenses):
+        # Validate every (value, category, description, date) tuple first,
+        # then insert them all with one executemany and a single commit
+        rows = [self._prepare_expense(*expense) for expense in expenses]
+        inserted = db.add_expenses_bulk(rows)
+        # executemany does not report the new ids, so rebuild the indexes lazily
+        self._invalidate_live_indexes()
+        return inserted
+
+    def import_expenses(self, rows, allowed_categories=None, member_ids=None):
+        """
+        Bulk import that skips bad rows instead of failing on the first one.
+        rows are (value, category, description, date[, member_id]) tuples; all of
+        them are checked at once with utils.validation.validate_expense_rows and
+        only the valid ones are inserted, in a single executemany. member_ids
+        defaults to the ids of the stored family members.
+        Returns a tuple: (number inserted, ValidationReport of the rejected rows)
+        """
+        rows = list(rows)
+        if member_ids is None:
+            member_ids = [member[0] for member in db.get_family_members()]
+        report = validate_expense_rows(rows, allowed_categories, member_ids)
+        valid_rows = report.select(rows)
+        inserted = db.add_expenses_bulk(valid_rows) if valid_rows else 0
+        if inserted:
+            self._invalidate_live_indexes()
+        return inserted, report
 
-    def delete_expense(self, expense):
-        # Delete expense from database by its ID
-        db.delete_expense(expense.id)
+    @contextmanager
+    def batch(self):
+        """
+        Group any mix of add/update/delete calls into one commit:
+
+            with tracker.batch():
+                tracker.add_expense(...)
+                tracker.delete_expense(...)
+
+        If the block raises, only the writes made inside it are rolled back.
+        """
+        try:
+            with self._live_write(), db.transaction():
+                yield self
+        except BaseException:
+            # The heap and rank indexes may hold writes that were just rolled back
+            self._invalidate_live_indexes()
+            raise
+
+    def delete_expense(self, expense, undoable=False):
+        # Delete expense from database by its ID; undoable also logs it for undo()
+        with self._live_write():
+            with db.transaction():
+                if undoable:
+                    db.record_command("delete_expense", expense.id)
+                db.delete_expense(expense.id)
+            self._index_removed(expense)
+
+    def _index_removed(self, expense):
+        # Remove it from the shared heap lazily, by id
+        if FamilyExpenseTracker._shared_heap is not None:
+            FamilyExpenseTracker._shared_heap.remove(expense.id)
+        for index in list(FamilyExpenseTracker._rank_indexes.values()):
+            index.remove(expense.id)
+        if FamilyExpenseTracker._date_index is not None:
+            FamilyExpenseTracker._date_index.remove(expense.date, to_cents(expense.value))
+        for engine in list(FamilyExpenseTracker._streak_engines.values()):
+            engine.add(to_day(expense.date), -to_cents(expense.value), -1)
+
+    def _step(self, step):
+        # Apply db.undo_command or db.redo_command and mirror it in the live indexes
+        with self._live_write():
+            result = step()
+            if result is not None:
+                self._mirror_step(step, *result)
+        return None if result is None else result[0]
+
+    def _mirror_step(self, step, command, row, applied):
+        if command.endswith("_expense"):
+            if not applied:
+                # The log and the indexes disagree about this row; rebuild lazily
+                self._invalidate_live_indexes()
+            elif (command == "add_expense") == (step is db.redo_command):
+                self._index_added(Expense.from_storage_row(row))
+            else:
+                self._index_removed(Expense.from_storage_row(row))
 
+    def undo(self):
+        """
+        Undo the newest command recorded with undoable=True, by primary key
+        in one transaction. The log lives in the database, so it survives a
+        browser refresh and is shared by every session.
+        Returns the undone command name (e.g. 'add_expense'), or None.
+        """
+        return self._step(db.undo_command)
+
+    def redo(self):
+        # Redo the most recently undone command; returns its name, or None
+        return self._step(db.redo_command)
+
+    def undo_redo_counts(self):
+        # (undoable, redoable) number of logged commands, for enabling buttons
+        return db.command_log_counts()
+
+    @_cached
     def calculate_total_expenditure(self):
-        # Retrieve all expenses and sum their values
-        expenses = db.get_expenses()
-        return sum(expense[1] for expense in expenses)  # expense[1] is the value
-
-    def get_spending_by_date(self):
-        # Retrieve all expenses and aggregate totals by date
-        expenses = db.get_expenses()
-        daily_totals = defaultdict(float)
-        for expense in expenses:
-            # Convert date string back to date object
-            date_obj = datetime.fromisoformat(expense[4]).date()
-            daily_totals[str(date_obj)] += expense[1]  # expense[1] is the value
-        return dict(daily_totals)
+        # Sum all expense values from the monthly rollup table
+        total_cents, _ = db.sum_rollups()
+        return from_cents(total_cents)
+
+    @_cached
+    def get_total_expense_between(self, start_date, end_date):
+        # Sum expenses dated between start_date and end_date, both inclusive,
+        # from the shared date index: O(log n) whatever the range or history
+        return from_cents(self.date_index.sum(start_date, end_date))
+
+    def load_columns(self, **filters):
+        # Columnar NumPy copy of the (optionally filtered) expenses for vectorized analytics
+        return ExpenseColumns.from_db(**filters)
+
+    def _spending_by(self, group_by, columns):
+        # (key, total_cents, count) per group, from the rollups or a loaded column store
+        if columns is not None:
+            return columns.group_by(group_by)
+        return db.aggregate_rollups(group_by)
+
+    @_cached
+    def get_spending_by_date(self, columns=None):
+        # Aggregate totals by date ('YYYY-MM-DD') from the daily rollup, or from
+        # an ExpenseColumns store (see load_columns) when one is given
+        return {str(from_day(day)): from_cents(total) for day, total, _ in self._spending_by("day", columns)}
+
+    def get_budget_streaks(self, daily_limit, today=None):
+        """
+        Returns (current, longest) runs of consecutive days with total spending
+        at or under daily_limit, counted from the first expense up to today.
+        The shared engine for this limit is built once from the daily rollup
+        and updated by add_expense/delete_expense, so this is a constant-time read.
+        """
+        limit_cents = to_cents(daily_limit)
+        self._sync_live_indexes()  # Rebuild if writes bypassed the tracker
+        engines = FamilyExpenseTracker._streak_engines
+        with FamilyExpenseTracker._heap_lock:
+            engine = engines.get(limit_cents)
+            if engine is not None:
+                engines.move_to_end(limit_cents)
+        if engine is None:
+            engine = BudgetStreaks(limit_cents, db.aggregate_rollups("day"))
+            with FamilyExpenseTracker._heap_lock:
+                engines[limit_cents] = engine
+                # Drop engines for limits no longer in use
+                while len(engines) > FamilyExpenseTracker.MAX_STREAK_ENGINES:
+                    engines.popitem(last=False)
+        return engine.current(today), engine.longest(today)
 
     def get_total_expense_this_week(self):
         # Calculate total expenses for the past 7 days including today
-        expenses = db.get_expenses()
         today = datetime.today().date()
         week_ago = today - timedelta(days=7)
-        total = 0
-        for expense in expenses:
-            expense_date = datetime.fromisoformat(expense[4]).date()
-            if week_ago <= expense_date <= today:
-                total += expense[1]
-        return total
+        return self.get_total_expense_between(week_ago, today)
 
     def get_total_expense_this_month(self):
         # Calculate total expenses for the current month
-        expenses = db.get_expenses()
         today = datetime.today().date()
         start_month = today.replace(day=1)
-        total = 0
-        for expense in expenses:
-            expense_date = datetime.fromisoformat(expense[4]).date()
-            if start_month <= expense_date <= today:
-                total += expense[1]
-        return total
-
-    def get_spending_by_month(self):
+        return self.get_total_expense_between(start_month, today)
+
+    @_cached
+    def get_spending_by_month(self, columns=None):
         # Aggregate expenses by month (YYYY-MM format) and sum values
-        expenses = db.get_expenses()
-        monthly_totals = defaultdict(float)
-        for expense in expenses:
-            expense_date = datetime.fromisoformat(expense[4]).date()
-            month = expense_date.strftime("%Y-%m")
-            monthly_totals[month] += expense[1]
-        return dict(monthly_totals)
+        return {month: from_cents(total) for month, total, _ in self._spending_by("month", columns)}
+
+    @_cached
+    def get_spending_by_week(self, columns=None):
+        # Aggregate expenses by ISO week, keyed by the week's Monday ('YYYY-MM-DD')
+        return {str(from_day(week)): from_cents(total) for week, total, _ in self._spending_by("week", columns)}
+
+    @_cached
+    def get_spending_by_category(self, columns=None):
+        # Aggregate expenses by category
+        return {category: from_cents(total) for category, total, _ in self._spending_by("category", columns)}
+
+    @_cached
+    def get_spending_by_member(self, columns=None):
+        # Aggregate expenses by family member id (None for unassigned expenses)
+        return {member_id: from_cents(total) for member_id, total, _ in self._spending_by("member", columns)}
 
-    def filter_expenses(self, start_date, end_date, categories, min_amount, max_amount):
+    @_cached
+    def get_spending_over_time(self, start_date=None, end_date=None, max_points=MAX_CHART_POINTS,
+                               categories=None, member_id=None):
+        """
+        Spending totals for a time-series chart. The bucket ('day', 'week',
+        'month', 'quarter' or 'year') is the finest that keeps the range within
+        max_points; an open range spans the first to the last expense.
+        The daily rollup rows are summed into buckets with NumPy.
+        Returns a tuple: (bucket, [(bucket start date, total), ...])
+        """
+        rows = db.aggregate_rollups("day", start_date=start_date, end_date=end_date,
+                                    categories=categories, member_id=member_id)
+        if not rows:
+            return "day", []
+        days, cents, _ = zip(*rows)
+        first_day = to_day(start_date) if start_date is not None else days[0]
+        last_day = to_day(end_date) if end_date is not None else days[-1]
+        bucket = choose_bucket(first_day, last_day, max_points)
+        starts, totals = bucket_totals(days, cents, bucket)
+        return bucket, [(from_day(start), from_cents(total))
+                        for start, total in zip(starts.tolist(), totals.tolist())]
+
+    def filter_expenses(self, start_date, end_date, categories, min_amount, max_amount,
+                        member_id=None, order_by=None, limit=None, offset=None):
         """
         Filters expenses based on provided criteria:
         - Date range between start_date and end_date
         - Expense category in categories list
         - Expense value between min_amount and max_amount
+        - Optionally, the family member the expense belongs to
+        The filtering runs as a single indexed SQL query; order_by, limit and
+        offset are passed through to db.query_expenses.
         Returns a list of Expense objects that match the filters.
         """
-        expenses = self.db.get_expenses()
-        filtered = []
-        for row in expenses:
-            expense_date = datetime.fromisoformat(row[4]).date()
-            if (start_date <= expense_date <= end_date and
-                row[2] in categories and
-                min_amount <= row[1] <= max_amount):
-                filtered.append(Expense.from_db_row(row))
-        return filtered
+        rows = self.db.query_expenses(
+            start_date=start_date,
+            end_date=end_date,
+            categories=categories,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            member_id=member_id,
+            order_by=order_by,
+            limit=limit,
+            offset=offset,
+        )
+        return Expense.from_storage_rows(rows)
+
+    def get_expense_page(self, page_size, before=None, after=None, **filters):
+        """
+        Returns one page of Expense objects, newest first, plus whether more
+        rows exist in the requested direction. See db.get_expense_page for
+        the meaning of before/after; keys are (day ordinal, id) pairs.
+        """
+        rows, has_more = self.db.get_expense_page(page_size, before=before, after=after, **filters)
+        return Expense.from_storage_rows(rows), has_more
+
+    def find_expense(self, value, category, description, date):
+        """
+        Returns the first stored Expense with exactly these fields, or None.
+        Uses an indexed lookup on the date instead of scanning all expenses.
+        """
+        rows = self.db.query_expenses(start_date=date, end_date=date, categories=[category],
+                                      min_amount=value, max_amount=value, order_by="id")
+        for row in rows:
+            if row[3] == description:
+                return Expense.from_storage_row(row)
+        return None
 
     def sort_expenses(self, expenses, sort_option, ascending=True):
         """
-        Sorts a list of Expense objects based on sort_option ('Date', 'Amount', 'Category').
+        Sorts Expense objects by sort_option: one of 'Date', 'Amount', 'Category',
+        or a list of keys such as [("Category", True), ("Amount", False)].
+        Ties are broken by ascending id. expenses is a list or an ExpenseSorter;
+        pass the same ExpenseSorter again to reuse its precomputed keys and orders.
         Returns the sorted list.
         """
-        key_funcs = {
-            "Date": lambda e: e.date,
-            "Amount": lambda e: e.value,
-            "Category": lambda e: e.category.lower()
-        }
-        key_func = key_funcs.get(sort_option, lambda e: e.date)
-        return sorted(expenses, key=key_func, reverse=not ascending)
-
-    def get_top_expenses(self, n=3):
-        # Rebuild heap from current database expenses to keep it updated
-        self.rebuild_expense_heap()
+        if not isinstance(expenses, ExpenseSorter):
+            expenses = ExpenseSorter(list(expenses))
+        return expenses.sorted(sort_option, ascending)
+
+    def get_sorted_expenses(self, sort_option, ascending=True, limit=None, offset=None, **filters):
+        """
+        Same ordering as sort_expenses, applied in SQL to the whole table (or to
+        the rows matching filters, those of db.query_expenses), so the database
+        can read them in index order instead of sorting them in Python.
+        Returns a list of Expense objects.
+        """
+        order_by = [(SORT_OPTIONS[option][1], term_ascending)
+                    for option, term_ascending in sort_spec(sort_option, ascending)]
+        order_by.append(("id", True))
+        rows = db.query_expenses(order_by=order_by, limit=limit, offset=offset, **filters)
+        return Expense.from_storage_rows(rows)
+
+    def get_top_expenses(self, n=3, **filters):
+        """
+        Returns the n largest expenses, largest first.
+        Without filters the answer comes from the shared heap. With filters
+        (the keyword arguments of db.query_expenses, e.g. categories=["Food"],
+        start_date=..., end_date=...) it is a bounded ORDER BY ... LIMIT n query,
+        so "top 5 this month in Food" never touches the rest of the table.
+        """
+        if filters:
+            return Expense.from_storage_rows(db.top_expenses(n, **filters))
+        # The heap is rebuilt first if writes bypassed the tracker (see _sync_live_indexes)
+        heap = self.expense_heap
         # Return the top n expenses using the heap
-        return self.expense_heap.get_top_n(n)
+        return heap.get_top_n(n)
+
+    def top_expenses_of(self, expenses, n=3):
+        # Top n of an in-memory or streamed collection, keeping only n at a time
+        return BoundedTopK(n).extend(expenses).results()
+
+    def get_leaderboard(self, group_by, k=3, **filters):
+        """
+        Returns the k largest expenses per group as {key: [Expense, ...]}.
+        group_by is 'category', 'member', 'week' or 'month' (see db.AGGREGATE_GROUPS);
+        week keys are the Monday's date and member keys are member ids.
+        """
+        leaderboard = {}
+        for key, row in db.top_expenses_by_group(k, group_by, **filters):
+            if group_by in ("day", "week"):
+                key = from_day(key)
+            leaderboard.setdefault(key, []).append(Expense.from_storage_row(row))
+        return leaderboard
+
+    def rank_index(self, year=None):
+        # The shared rank index for one year (or all time), built on first use
+        filters = {}
+        if year is not None:
+            filters = {"start_date": date_type(year, 1, 1), "end_date": date_type(year, 12, 31)}
+        self._sync_live_indexes()  # Same guard as the heap
+        index = FamilyExpenseTracker._rank_indexes.get(year)
+        if index is None:
+            index = ExpenseRankIndex(Expense.from_storage_rows(db.iter_expenses(**filters)))
+            with FamilyExpenseTracker._heap_lock:
+                index = FamilyExpenseTracker._rank_indexes.setdefault(year, index)
+        return index
+
+    def get_expense_rank(self, expense, year=None):
+        """
+        Returns (rank, top_percent) of an expense by value within a year
+        (or all time): rank 1 is the largest, and top_percent is the share of
+        expenses at least as large, e.g. 3.0 for "top 3% this year".
+        """
+        index = self.rank_index(year)
+        return index.rank(expense), index.top_percent(expense.value)
+
+    def _build_expense_heap(self):
+        # Build a max-heap with all current expenses
+        heap = ExpenseHeap()
+        # Rows are streamed in batches and converted by the batch factory
+        for expense in Expense.from_storage_rows(db.iter_expenses()):
+            heap.push(expense)
+        return heap
 
     def rebuild_expense_heap(self):
-        # Clear and rebuild the max-heap with all current expenses
-        self.expense_heap = ExpenseHeap()
-        expenses = db.get_expenses()
-        for expense in expenses:
-            # Convert date string to date object for Expense initialization
-            expense_date = datetime.fromisoformat(expense[4]).date()
-            exp_obj = Expense(expense[1], expense[2], expense[3], expense_date)
-            self.expense_heap.push(exp_obj)
\ No newline at end of file
+        # Clear and rebuild the shared max-heap from the database (repair path);
+        # the rank, date and streak indexes are dropped too and rebuild on their next use
+        generation = db.data_generation()
+        heap = self._build_expense_heap()
+        with FamilyExpenseTracker._heap_lock:
+            FamilyExpenseTracker._indexes_generation = generation
+            FamilyExpenseTracker._shared_heap = heap
+            FamilyExpenseTracker._rank_indexes = {}
+            FamilyExpenseTracker._date_index = None
+            FamilyExpenseTracker._streak_engines = OrderedDict()
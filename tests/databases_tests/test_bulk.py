@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import unittest
+from datetime import date
+import db
+from models.tracker import FamilyExpenseTracker
+
+class TestBulkAndBatch(unittest.TestCase):
+    def setUp(self):
+        # Initialize DB and clear tables for clean slate
+        db.init_db()
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM expenses")
+            conn.execute("DELETE FROM family_members")
+            conn.commit()
+
+        self.tracker = FamilyExpenseTracker()
+        self.today = date.today().isoformat()
+
+    def test_add_expenses_bulk(self):
+        inserted = db.add_expenses_bulk([
+            (10, "Food", "Snack", self.today),
+            (20, "Transport", "Bus", self.today, None),
+        ])
+        self.assertEqual(inserted, 2)
+        self.assertEqual(len(db.get_expenses()), 2)
+
+    def test_import_skips_invalid_rows(self):
+        inserted, report = self.tracker.import_expenses([
+            (10, "Food", "Snack", self.today),
+            (-3, "Food", "Refund?", self.today),
+            (20, "Transport", "Bus", "not a date"),
+        ])
+        self.assertEqual(inserted, 1)
+        self.assertEqual([(row, field) for row, field, _ in report.errors], [(1, "value"), (2, "date")])
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 10)
+
+    def test_import_skips_rows_that_would_abort_the_insert(self):
+        # An infinite amount or an unknown member would fail the whole executemany
+        member_id = self.tracker.add_family_member("Alice", True, 4000)
+        inserted, report = self.tracker.import_expenses([
+            (10, "Food", "Snack", self.today, member_id),
+            (float("inf"), "Food", "Overflow", self.today),
+            (20, "Transport", "Bus", self.today, 999),
+            (30, "Other", "Gift", self.today, "Alice"),
+            (1e20, "Food", "Too large for an INTEGER", self.today),
+            (40, "Food", "Ordinal zero", 0),
+            (50, "Food", "Bool date", True),
+        ])
+        self.assertEqual(inserted, 1)
+        self.assertEqual([(row, field) for row, field, _ in report.errors],
+                         [(1, "value"), (2, "member_id"), (3, "member_id"), (4, "value"),
+                          (5, "date"), (6, "date")])
+        # Every read still works after the import
+        self.assertEqual(len(self.tracker.filter_expenses(None, None, None, None, None)), 1)
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 10)
+
+    def test_tracker_add_expenses_validates_before_insert(self):
+        with self.assertRaises(ValueError):
+            self.tracker.add_expenses([
+                (10, "Food", "Snack", self.today),
+                (0, "Food", "Invalid", self.today),
+            ])
+        # Nothing is written when any row fails validation
+        self.assertEqual(db.get_expenses(), [])
+
+    def test_tracker_add_family_members(self):
+        inserted = self.tracker.add_family_members([("Alice", True, 4000), ("Bob", False, 0)])
+        self.assertEqual(inserted, 2)
+        self.assertEqual(self.tracker.calculate_total_earnings(), 4000)
+
+    def test_batch_commits_mixed_writes(self):
+        expense_id = db.add_expense(5, "Other", "Gum", self.today)
+        with self.tracker.batch():
+            self.tracker.add_expense(100, "Food", "Lunch", self.today)
+            self.tracker.add_family_member("Alice", True, 3000)
+            db.delete_expense(expense_id)
+        self.assertFalse(db.in_transaction())
+        self.assertEqual([e[1] for e in db.get_expenses()], [100])
+        self.assertEqual(len(db.get_family_members()), 1)
+
+    def test_batch_failure_rolls_back_only_the_batch(self):
+        self.tracker.add_expense(50, "Food", "Kept", self.today)
+        with self.assertRaises(RuntimeError):
+            with self.tracker.batch():
+                self.tracker.add_expense(75, "Food", "Discarded", self.today)
+                raise RuntimeError("boom")
+        self.assertEqual([e[3] for e in db.get_expenses()], ["Kept"])
+
+    def test_nested_batch_failure_keeps_outer_writes(self):
+        with self.tracker.batch():
+            self.tracker.add_expense(10, "Food", "Outer", self.today)
+            try:
+                with self.tracker.batch():
+                    self.tracker.add_expense(20, "Food", "Inner", self.today)
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+        self.assertEqual([e[3] for e in db.get_expenses()], ["Outer"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import unittest
+from datetime import date
+import db
+from models.tracker import FamilyExpenseTracker
+
+class TestExpenseColumns(unittest.TestCase):
+    def setUp(self):
+        # Initialize DB and clear tables
+        db.init_db()
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM expenses")
+            conn.execute("DELETE FROM family_members")
+            conn.commit()
+
+        self.tracker = FamilyExpenseTracker()
+        self.member_id = db.add_family_member("Alice", True, 4000)
+        db.add_expense(12.5, "Food", "Lunch", "2025-05-15", self.member_id)
+        db.add_expense(7.5, "Food", "Coffee", "2025-05-15")
+        db.add_expense(40, "Utilities", "Water", "2025-06-01")
+        db.add_expense(0.1, "Transport", "Ticket", "2025-06-03", self.member_id)
+        self.columns = self.tracker.load_columns()
+
+    def test_group_by_matches_sql_aggregates(self):
+        for group_by in ("day", "week", "month", "category", "member"):
+            self.assertEqual(self.columns.group_by(group_by), db.aggregate_expenses(group_by), group_by)
+        self.assertEqual(self.tracker.get_spending_by_month(columns=self.columns),
+                         self.tracker.get_spending_by_month())
+
+    def test_range_sum_and_filtered_sum(self):
+        self.assertEqual(self.columns.range_sum(date(2025, 5, 15), date(2025, 6, 1)), (6000, 3))
+        self.assertEqual(self.columns.range_sum(date(2025, 7, 1)), (0, 0))
+        self.assertEqual(self.columns.sum(categories=["Food"], min_amount=10), (1250, 1))
+        self.assertEqual(self.columns.sum(member_id=self.member_id), db.sum_expenses(member_id=self.member_id))
+        self.assertEqual(self.columns.sum(categories=[]), db.sum_expenses(categories=[]))
+
+    def test_histogram(self):
+        counts, edges = self.columns.histogram(bins=[0, 10, 50])
+        self.assertEqual(counts, [2, 2])
+        self.assertEqual(edges, [0.0, 10.0, 50.0])
+
+    def test_filtered_load(self):
+        columns = self.tracker.load_columns(categories=["Food"])
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(columns.group_by("category"), [("Food", 2000, 2)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import tempfile
+from datetime import date
+import unittest
+import db
+from models.family_member import FamilyMember
+from models.tracker import FamilyExpenseTracker
+
+class TestCommandLog(unittest.TestCase):
+    def setUp(self):
+        # Each test gets its own database file, so the log starts empty
+        self.original_db_file = db.DB_FILE
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db.DB_FILE = os.path.join(self.tmpdir.name, "command_log.db")
+        db.init_db()
+        self.tracker = FamilyExpenseTracker()
+        self.tracker.rebuild_expense_heap()
+
+    def tearDown(self):
+        db.close_all_connections()
+        db.DB_FILE = self.original_db_file
+        self.tmpdir.cleanup()
+
+    def _expense_ids(self):
+        return [row[0] for row in db.query_expenses(order_by="id")]
+
+    def test_undo_redo_add_expense_by_id(self):
+        # Two identical expenses: undo must remove the one that was added last
+        first = self.tracker.add_expense(20, "Food", "Lunch", date(2025, 5, 15), undoable=True)
+        second = self.tracker.add_expense(20, "Food", "Lunch", date(2025, 5, 15), undoable=True)
+        self.assertEqual(self.tracker.undo(), "add_expense")
+        self.assertEqual(self._expense_ids(), [first])
+        self.assertEqual(db.command_log_counts(), (1, 1))
+        # Redo puts the row back under the same id
+        self.assertEqual(self.tracker.redo(), "add_expense")
+        self.assertEqual(self._expense_ids(), [first, second])
+        self.assertIsNone(self.tracker.redo())
+
+    def test_undo_delete_expense_restores_row(self):
+        expense_id = self.tracker.add_expense(35.5, "Transport", "Taxi", date(2025, 5, 16))
+        expense = self.tracker.find_expense(35.5, "Transport", "Taxi", date(2025, 5, 16))
+        self.tracker.delete_expense(expense, undoable=True)
+        self.assertEqual(self._expense_ids(), [])
+        self.tracker.undo()
+        restored = self.tracker.find_expense(35.5, "Transport", "Taxi", date(2025, 5, 16))
+        self.assertEqual(restored.id, expense_id)
+        # The live indexes follow undo/redo like any other write
+        self.assertEqual(self.tracker.get_total_expense_between(date(2025, 5, 1), date(2025, 5, 31)), 35.5)
+        self.assertEqual([e.id for e in self.tracker.get_top_expenses(1)], [expense_id])
+        self.tracker.redo()
+        self.assertEqual(self.tracker.get_total_expense_between(date(2025, 5, 1), date(2025, 5, 31)), 0)
+
+    def test_undo_delete_member_relinks_expenses(self):
+        member_id = self.tracker.add_family_member("Alice", True, 4000, undoable=True)
+        expense_id = db.add_expense(10, "Food", "Snack", "2025-05-15", member_id)
+        member_row = db.get_family_members()[0]
+        self.tracker.delete_family_member(FamilyMember.from_db_row(member_row), undoable=True)
+        # ON DELETE SET NULL unlinks the member's expenses
+        self.assertIsNone(db.query_expenses()[0][5])
+        self.assertEqual(self.tracker.undo(), "delete_member")
+        self.assertEqual(db.get_family_members(), [member_row])
+        expense = db.query_expenses()[0]
+        self.assertEqual((expense[0], expense[5]), (expense_id, member_id))
+
+    def test_new_command_clears_redo_and_log_is_bounded(self):
+        self.tracker.add_expense(1, "Food", "a", date(2025, 5, 15), undoable=True)
+        self.tracker.undo()
+        self.tracker.add_expense(2, "Food", "b", date(2025, 5, 15), undoable=True)
+        self.assertEqual(db.command_log_counts(), (1, 0))
+        for _ in range(db.COMMAND_LOG_LIMIT + 5):
+            self.tracker.add_expense(3, "Food", "c", date(2025, 5, 15), undoable=True)
+        self.assertEqual(db.command_log_counts(), (db.COMMAND_LOG_LIMIT, 0))
+
+    def test_history_survives_reconnect(self):
+        # A browser refresh gets a new session and connection; the log is in the database
+        self.tracker.add_expense(5, "Other", "Stamp", date(2025, 5, 15), undoable=True)
+        db.close_all_connections()
+        self.assertEqual(FamilyExpenseTracker().undo(), "add_expense")
+        self.assertEqual(self._expense_ids(), [])
+
+    def test_stale_entry_is_consumed(self):
+        # Deleting the row outside the log leaves nothing for undo to remove
+        expense_id = self.tracker.add_expense(7, "Food", "Tea", date(2025, 5, 15), undoable=True)
+        db.delete_expense(expense_id)
+        self.assertEqual(self.tracker.undo(), "add_expense")
+        self.assertEqual(self.tracker.undo_redo_counts(), (0, 1))
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 0)
+
+    def test_failed_immediate_step_rolls_back(self):
+        # An error inside transaction(immediate=True) leaves no transaction open
+        with self.assertRaises(RuntimeError):
+            with db.transaction(immediate=True) as conn:
+                conn.execute("DELETE FROM command_log")
+                raise RuntimeError("abort")
+        self.assertFalse(db.get_connection().in_transaction)
+
+if __name__ == '__main__':
+    unittest.main()
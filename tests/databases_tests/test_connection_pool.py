@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import gc
+import threading
+import unittest
+import db
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        db.init_db()
+
+    def tearDown(self):
+        db.close_all_connections()
+
+    def _connection_from_thread(self):
+        # Grab the pooled connection a fresh worker thread would get
+        result = {}
+        def worker():
+            result["conn"] = db.get_connection()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        gc.collect()
+        return result["conn"]
+
+    def test_same_thread_reuses_connection(self):
+        self.assertIs(db.get_connection(), db.get_connection())
+
+    def test_threads_get_separate_connections(self):
+        main_conn = db.get_connection()
+        self.assertIsNot(self._connection_from_thread(), main_conn)
+
+    def test_finished_thread_returns_connection_to_pool(self):
+        first = self._connection_from_thread()
+        second = self._connection_from_thread()
+        self.assertIs(first, second)
+
+    def test_pragma_profile_applied(self):
+        conn = db.get_connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+        self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], db.PRAGMAS["busy_timeout"])
+
+    def test_configure_pragmas_reapplied(self):
+        original = db.PRAGMAS["busy_timeout"]
+        try:
+            db.configure_pragmas(busy_timeout=1234)
+            conn = db.get_connection()
+            self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], 1234)
+        finally:
+            db.configure_pragmas(busy_timeout=original)
+
+    def test_close_connection_opens_new_one(self):
+        conn = db.get_connection()
+        db.close_connection()
+        self.assertIsNot(db.get_connection(), conn)
+
+if __name__ == "__main__":
+    unittest.main()
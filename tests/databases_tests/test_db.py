@@ -61,5 +61,42 @@ class TestDBOperations(unittest.TestCase):
         expenses = db.get_expenses()
         self.assertFalse(any(e[0] == expense_id for e in expenses))
 
+    def test_iter_expenses_streams_in_batches(self):
+        # Rows arrive in order across several fetchmany batches
+        db.add_expenses_bulk([(i + 1, "Food", f"Item {i}", date.today().isoformat()) for i in range(7)])
+        rows = list(db.iter_expenses(batch_size=3, order_by="value"))
+        self.assertEqual([row[1] for row in rows], [100 * (i + 1) for i in range(7)])
+
+    def test_iter_expenses_projection_and_filters(self):
+        db.add_expense(10, "Food", "Lunch", date.today().isoformat())
+        db.add_expense(30, "Transport", "Taxi", date.today().isoformat())
+        rows = list(db.iter_expenses(columns=("category", "value_cents"), categories=["Transport"]))
+        self.assertEqual(rows, [("Transport", 3000)])
+        with self.assertRaises(ValueError):
+            list(db.iter_expenses(columns=("value_cents", "secret")))
+
+    def test_expense_pages_walk_both_directions(self):
+        # Five expenses on three days, paged two at a time, newest first
+        days = ["2025-05-01", "2025-05-02", "2025-05-02", "2025-05-03", "2025-05-03"]
+        ids = [db.add_expense(10, "Food", "Item", day) for day in days]
+
+        first, more = db.get_expense_page(2)
+        self.assertEqual([row[0] for row in first], [ids[4], ids[3]])
+        self.assertTrue(more)
+
+        key = (first[-1][4], first[-1][0])
+        second, more = db.get_expense_page(2, before=key)
+        self.assertEqual([row[0] for row in second], [ids[2], ids[1]])
+        self.assertTrue(more)
+
+        last, more = db.get_expense_page(2, before=(second[-1][4], second[-1][0]))
+        self.assertEqual([row[0] for row in last], [ids[0]])
+        self.assertFalse(more)
+
+        # Walking back up from the second page returns the first page again
+        back, more = db.get_expense_page(2, after=(second[0][4], second[0][0]))
+        self.assertEqual(back, first)
+        self.assertFalse(more)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import csv
+import importlib.util
+import io
+import unittest
+from datetime import date
+import db
+from utils.export import export_expenses, iter_csv_chunks, iter_export_rows
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        # Initialize DB and clear tables
+        db.init_db()
+        with db.transaction() as conn:
+            conn.execute("DELETE FROM expenses")
+            conn.execute("DELETE FROM family_members")
+
+        db.add_expenses_bulk([
+            (12.5, "Food", "Lunch", "2025-05-15"),
+            (40, "Utilities", "Water, cold", "2025-06-01"),
+            (7.25, "Food", "Coffee", "2025-06-02"),
+        ])
+
+    def test_csv_export_with_filters(self):
+        data = export_expenses("CSV", start_date=date(2025, 6, 1), categories=["Food", "Utilities"])
+        rows = list(csv.reader(io.StringIO(data.decode("utf-8"))))
+        self.assertEqual(rows, [
+            ["Date", "Category", "Amount", "Description"],
+            ["2025-06-01", "Utilities", "40.0", "Water, cold"],
+            ["2025-06-02", "Food", "7.25", "Coffee"],
+        ])
+
+    def test_csv_is_streamed_in_chunks(self):
+        chunks = list(iter_csv_chunks(iter_export_rows(), chunk_rows=2))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(b"".join(chunks), export_expenses("CSV"))
+        self.assertEqual(export_expenses("CSV", categories=["Other"]), b"Date,Category,Amount,Description\r\n")
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_parquet_and_arrow_round_trip(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pq.read_table(io.BytesIO(export_expenses("Parquet", categories=["Food"])))
+        self.assertEqual(table.column("amount").to_pylist(), [12.5, 7.25])
+        self.assertEqual(table.column("date").to_pylist(), [date(2025, 5, 15), date(2025, 6, 2)])
+        reader = pa.ipc.open_file(pa.BufferReader(export_expenses("Arrow")))
+        self.assertEqual(reader.read_all().num_rows, 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -47,5 +47,39 @@ class TestFiltering(unittest.TestCase):
         for expense in filtered:
             self.assertTrue(date.today() - timedelta(days=5) <= expense.date <= date.today())
 
+    def test_filter_by_amount_and_member(self):
+        member_id = db.get_family_members()[0][0]
+        db.add_expense(300, "Transport", "Train", date.today().isoformat(), member_id)
+        filtered = self.tracker.filter_expenses(
+            start_date=date.today() - timedelta(days=30),
+            end_date=date.today(),
+            categories=["Food", "Utilities", "Transport", "Other"],
+            min_amount=120,
+            max_amount=1000,
+            member_id=member_id
+        )
+        self.assertEqual([exp.value for exp in filtered], [300])
+
+    def test_filter_with_order_and_limit(self):
+        filtered = self.tracker.filter_expenses(
+            start_date=date.today() - timedelta(days=30),
+            end_date=date.today(),
+            categories=["Food", "Utilities"],
+            min_amount=0,
+            max_amount=1000,
+            order_by=[("value", False)],
+            limit=2,
+            offset=1
+        )
+        self.assertEqual([exp.value for exp in filtered], [150, 100])
+
+    def test_empty_category_selection_matches_nothing(self):
+        rows = db.query_expenses(categories=[])
+        self.assertEqual(rows, [])
+
+    def test_rejects_unknown_sort_column(self):
+        with self.assertRaises(ValueError):
+            db.query_expenses(order_by=[("value; DROP TABLE expenses", True)])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,100 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import sqlite3
+import tempfile
+import threading
+from datetime import date
+import unittest
+import db
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        # Run migrations against a throwaway database file
+        self.original_db_file = db.DB_FILE
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db.DB_FILE = os.path.join(self.tmpdir.name, "migrations.db")
+
+    def tearDown(self):
+        db.close_all_connections()
+        db.DB_FILE = self.original_db_file
+        self.tmpdir.cleanup()
+
+    def _index_names(self):
+        rows = db.get_connection().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'expenses'"
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def test_fresh_database_reaches_latest_version(self):
+        db.init_db()
+        self.assertEqual(db.get_schema_version(), db.SCHEMA_VERSION)
+        self.assertTrue({"idx_expenses_day_value", "idx_expenses_category_day",
+                         "idx_expenses_member_day"} <= self._index_names())
+
+    def test_init_db_is_idempotent(self):
+        db.init_db()
+        db.add_expense(10, "Food", "Lunch", "2025-05-15")
+        db.init_db()
+        self.assertEqual(db.get_schema_version(), db.SCHEMA_VERSION)
+        self.assertEqual(len(db.get_expenses()), 1)
+
+    def test_concurrent_init_db(self):
+        # Sessions starting together against a fresh database all succeed
+        errors = []
+        def start_session():
+            try:
+                for _ in range(5):
+                    db.init_db()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                db.close_connection()
+        threads = [threading.Thread(target=start_session) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(db.get_schema_version(), db.SCHEMA_VERSION)
+
+    def test_upgrades_unversioned_database(self):
+        # A database created before migrations existed has tables but user_version 0
+        conn = sqlite3.connect(db.DB_FILE)
+        conn.execute("CREATE TABLE family_members (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,"
+                     " earning_status INTEGER NOT NULL, earnings REAL NOT NULL)")
+        conn.execute("CREATE TABLE expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, value REAL NOT NULL,"
+                     " category TEXT NOT NULL, description TEXT, date TEXT NOT NULL, member_id INTEGER)")
+        conn.execute("INSERT INTO expenses (value, category, description, date) VALUES (5.1, 'Food', 'Old', '2024-01-01')")
+        conn.execute("INSERT INTO expenses (value, category, description, date) VALUES (19.99, 'Food', 'Timed', '2024-02-29T13:45:00')")
+        conn.commit()
+        conn.close()
+
+        db.init_db()
+        self.assertEqual(db.get_schema_version(), db.SCHEMA_VERSION)
+        self.assertIn("idx_expenses_day_value", self._index_names())
+        # Values become integer cents and dates become day ordinals
+        rows = db.query_expenses(order_by="id")
+        self.assertEqual([(row[1], row[4]) for row in rows],
+                         [(510, date(2024, 1, 1).toordinal()), (1999, date(2024, 2, 29).toordinal())])
+        # The legacy accessor still returns currency units and ISO dates
+        self.assertEqual([(row[1], row[4]) for row in db.get_expenses()],
+                         [(5.1, "2024-01-01"), (19.99, "2024-02-29")])
+
+    def test_date_range_uses_index(self):
+        db.init_db()
+        plan = db.get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT SUM(value_cents) FROM expenses WHERE day BETWEEN ? AND ?",
+            (date(2025, 1, 1).toordinal(), date(2025, 1, 31).toordinal()),
+        ).fetchall()
+        self.assertTrue(any("idx_expenses_day_value" in row[-1] for row in plan))
+
+    def test_sums_are_exact_in_cents(self):
+        db.init_db()
+        db.add_expenses_bulk([(0.1, "Food", "Gum", "2025-01-01")] * 3)
+        total_cents, count = db.sum_expenses()
+        self.assertEqual((total_cents, count), (30, 3))
+
+if __name__ == "__main__":
+    unittest.main()
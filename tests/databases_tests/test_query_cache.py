@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import sqlite3
+import unittest
+from datetime import date
+import db
+from models.query_cache import QueryCache
+from models.tracker import FamilyExpenseTracker
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        # Initialize DB and clear tables
+        db.init_db()
+        with db.transaction() as conn:
+            conn.execute("DELETE FROM expenses")
+            conn.execute("DELETE FROM family_members")
+
+        self.tracker = FamilyExpenseTracker()
+        self.tracker.add_expense(12.5, "Food", "Lunch", date(2025, 5, 15))
+
+    def test_repeated_reads_hit_the_cache(self):
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 12.5)
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 12.5)
+        self.assertEqual(self.tracker.get_spending_by_category(), {"Food": 12.5})
+        stats = self.tracker.query_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_tracker_writes_invalidate(self):
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 12.5)
+        self.tracker.add_expense(7.5, "Food", "Coffee", date(2025, 5, 15))
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 20.0)
+        self.tracker.add_family_member("Alice", True, 4000)
+        self.assertEqual(self.tracker.calculate_total_earnings(), 4000)
+
+    def test_writes_from_another_connection_invalidate(self):
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 12.5)
+        other = sqlite3.connect(db.DB_FILE)
+        other.execute("DELETE FROM expenses")
+        other.commit()
+        other.close()
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 0)
+
+    def test_rolled_back_batch_is_not_served(self):
+        # Reads inside a batch bypass the cache, and the rollback invalidates it
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 12.5)
+        with self.assertRaises(RuntimeError):
+            with self.tracker.batch():
+                self.tracker.add_expense(90, "Food", "Groceries", date(2025, 5, 15))
+                self.assertEqual(self.tracker.calculate_total_expenditure(), 102.5)
+                raise RuntimeError("abort")
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 12.5)
+
+    def test_write_while_computing_is_not_cached(self):
+        cache = QueryCache()
+        generations = iter([2])
+        self.assertEqual(cache.get_or_compute("a", 1, lambda: 1, lambda: next(generations)), 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = QueryCache(maxsize=2)
+        cache.get_or_compute("a", 1, lambda: 1)
+        cache.get_or_compute("b", 1, lambda: 2)
+        cache.get_or_compute("a", 1, lambda: 0)  # Hit; "b" is now least recently used
+        cache.get_or_compute("c", 1, lambda: 3)
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.get_or_compute("a", 2, lambda: 10), 10)  # New generation
+        self.assertEqual(cache.stats()["size"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import sqlite3
+import unittest
+from datetime import date
+import db
+from models.tracker import FamilyExpenseTracker
+
+class TestRollups(unittest.TestCase):
+    def setUp(self):
+        # Initialize DB and clear tables; the delete triggers empty the rollups too
+        db.init_db()
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM expenses")
+            conn.execute("DELETE FROM family_members")
+            conn.commit()
+
+        self.tracker = FamilyExpenseTracker()
+        self.member_id = db.add_family_member("Alice", True, 4000)
+        self.lunch = db.add_expense(12.5, "Food", "Lunch", "2025-05-15", self.member_id)
+        db.add_expense(7.5, "Food", "Coffee", "2025-05-15")
+        db.add_expense(40, "Utilities", "Water", "2025-06-01")
+
+    def _daily(self):
+        return db.get_connection().execute(
+            "SELECT day, category, member_key, total_cents, expense_count FROM daily_totals ORDER BY 1, 2, 3"
+        ).fetchall()
+
+    def _assert_rollups_match_expenses(self):
+        self.assertEqual(db.aggregate_rollups("day"), db.aggregate_expenses("day"))
+        self.assertEqual(db.aggregate_rollups("month"), db.aggregate_expenses("month"))
+        self.assertEqual(db.aggregate_rollups("category"), db.aggregate_expenses("category"))
+        self.assertEqual(db.aggregate_rollups("member"), db.aggregate_expenses("member"))
+
+    def test_insert_maintains_rollups(self):
+        may_15 = date(2025, 5, 15).toordinal()
+        self.assertIn((may_15, "Food", self.member_id, 1250, 1), self._daily())
+        self.assertIn((may_15, "Food", 0, 750, 1), self._daily())
+        self.assertEqual(self.tracker.get_spending_by_month(), {"2025-05": 20.0, "2025-06": 40.0})
+        self._assert_rollups_match_expenses()
+
+    def test_update_and_delete_maintain_rollups(self):
+        db.update_expense(self.lunch, value=20, date_str="2025-06-02")
+        self._assert_rollups_match_expenses()
+        db.delete_expense(self.lunch)
+        self._assert_rollups_match_expenses()
+        self.assertEqual(self.tracker.calculate_total_expenditure(), 47.5)
+
+    def test_deleting_member_moves_totals_to_unassigned(self):
+        db.delete_family_member(self.member_id)
+        self.assertEqual(self.tracker.get_spending_by_member(), {None: 60.0})
+
+    def test_range_totals_from_rollups(self):
+        total = self.tracker.get_total_expense_between(date(2025, 5, 1), date(2025, 5, 31))
+        self.assertEqual(total, 20.0)
+        self.assertEqual(db.aggregate_rollups("month", start_date=date(2025, 5, 20)), [("2025-06", 4000, 1)])
+
+    def test_range_totals_follow_tracker_writes(self):
+        may = (date(2025, 5, 1), date(2025, 5, 31))
+        self.assertEqual(self.tracker.get_total_expense_between(*may), 20.0)
+        expense_id = self.tracker.add_expense(5, "Food", "Snack", date(2025, 5, 20))
+        self.assertEqual(self.tracker.get_total_expense_between(*may), 25.0)
+        self.tracker.delete_expense(self.tracker.find_expense(5, "Food", "Snack", date(2025, 5, 20)))
+        self.assertEqual(self.tracker.get_total_expense_between(*may), 20.0)
+        # A write that bypasses the tracker moves the data generation on
+        db.delete_expense(self.lunch)
+        self.assertEqual(self.tracker.get_total_expense_between(*may), 7.5)
+        self.assertIsNotNone(expense_id)
+
+    def test_range_totals_follow_updates_that_keep_the_count(self):
+        may = (date(2025, 5, 1), date(2025, 5, 31))
+        self.assertEqual(self.tracker.get_total_expense_between(*may), 20.0)
+        db.update_expense(self.lunch, value=99)
+        self.assertEqual(self.tracker.get_total_expense_between(*may), 106.5)
+        # A delete plus an insert from another connection keeps the count too
+        other = sqlite3.connect(db.DB_FILE)
+        other.execute("DELETE FROM expenses WHERE id = ?", (self.lunch,))
+        other.execute("INSERT INTO expenses (value_cents, category, description, day) VALUES (300, 'Food', 'Tea', ?)",
+                      (date(2025, 5, 20).toordinal(),))
+        other.commit()
+        other.close()
+        self.assertEqual(self.tracker.get_total_expense_between(*may), 10.5)
+
+    def test_spending_over_time_picks_bucket(self):
+        bucket, series = self.tracker.get_spending_over_time()
+        self.assertEqual(bucket, "day")
+        self.assertEqual(series, [(date(2025, 5, 15), 20.0), (date(2025, 6, 1), 40.0)])
+        bucket, series = self.tracker.get_spending_over_time(date(2024, 1, 1), date(2025, 12, 31))
+        self.assertEqual(bucket, "week")
+        bucket, series = self.tracker.get_spending_over_time(max_points=1)
+        # May 15 - Jun 1 touches two months, so one point needs a quarter
+        self.assertEqual((bucket, series), ("quarter", [(date(2025, 4, 1), 60.0)]))
+
+    def test_budget_streaks_follow_writes(self):
+        today = date(2025, 6, 3)
+        # May 15 (20.0) and Jun 1 (40.0) are both within a 50 limit
+        self.assertEqual(self.tracker.get_budget_streaks(50, today), (20, 20))
+        self.tracker.add_expense(15, "Food", "Dinner", date(2025, 6, 1))
+        self.assertEqual(self.tracker.get_budget_streaks(50, today), (2, 17))
+        self.tracker.delete_expense(self.tracker.find_expense(15, "Food", "Dinner", date(2025, 6, 1)))
+        self.assertEqual(self.tracker.get_budget_streaks(50, today), (20, 20))
+        self.assertEqual(self.tracker.get_budget_streaks(10, today), (2, 16))
+
+    def test_streak_engines_are_bounded(self):
+        # Each limit typed in builds an engine; only the most recently used are kept
+        today = date(2025, 6, 3)
+        for limit in range(5, 5 * (FamilyExpenseTracker.MAX_STREAK_ENGINES + 3), 5):
+            self.tracker.get_budget_streaks(limit, today)
+        self.tracker.get_budget_streaks(50, today)
+        engines = FamilyExpenseTracker._streak_engines
+        self.assertEqual(len(engines), FamilyExpenseTracker.MAX_STREAK_ENGINES)
+        self.assertEqual(next(reversed(engines)), 5000)
+
+    def test_rebuild_repairs_rollups(self):
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM daily_totals")
+            conn.execute("UPDATE monthly_totals SET total_cents = 1")
+        db.rebuild_rollups()
+        self._assert_rollups_match_expenses()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,6 +5,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 import unittest
 from datetime import date, timedelta
 import db
+from models.expense_sorter import ExpenseSorter
 from models.tracker import FamilyExpenseTracker
 
 class TestSorting(unittest.TestCase):
@@ -50,5 +51,45 @@ class TestSorting(unittest.TestCase):
         dates = [expense.date for expense in sorted_expenses]
         self.assertEqual(dates, sorted(dates, reverse=True))
 
+    def test_multi_key_sort_with_id_tie_break(self):
+        expenses = self.tracker.filter_expenses(None, None, None, None, None)
+        expenses.reverse()  # Input order must not matter
+        sorted_expenses = self.tracker.sort_expenses(expenses, [("Category", True), ("Amount", False)])
+        self.assertEqual([(e.category, e.value) for e in sorted_expenses],
+                         [("Food", 100), ("Food", 50), ("Utilities", 150)])
+        # Equal keys fall back to ascending id
+        by_day = self.tracker.sort_expenses(expenses, "Date", ascending=False)
+        self.assertEqual([e.description for e in by_day], ["Groceries", "Electricity", "Snack"])
+
+    def test_sorter_reuses_orders(self):
+        sorter = ExpenseSorter(self.tracker.filter_expenses(None, None, None, None, None))
+        first = self.tracker.sort_expenses(sorter, "Amount", ascending=False)
+        self.tracker.sort_expenses(sorter, "Category")
+        self.assertEqual(self.tracker.sort_expenses(sorter, "Amount", ascending=False), first)
+        self.assertEqual(len(sorter.orders), 2)
+
+    def test_sql_sort_matches_in_memory_sort(self):
+        spec = [("Category", True), ("Amount", False)]
+        in_memory = self.tracker.sort_expenses(self.tracker.filter_expenses(None, None, None, None, None), spec)
+        self.assertEqual([e.id for e in self.tracker.get_sorted_expenses(spec)], [e.id for e in in_memory])
+        self.assertEqual([e.value for e in self.tracker.get_sorted_expenses("Amount", limit=2)], [50, 100])
+
+    def test_sql_category_sort_ignores_case(self):
+        # Imported rows can carry categories in any case
+        self.tracker.add_expense(10, "apple", "Fruit", date.today())
+        self.tracker.add_expense(20, "Banana", "Fruit", date.today())
+        expenses = self.tracker.filter_expenses(None, None, ["apple", "Banana"], None, None)
+        in_memory = self.tracker.sort_expenses(expenses, "Category")
+        in_sql = self.tracker.get_sorted_expenses("Category", categories=["apple", "Banana"])
+        self.assertEqual([e.category for e in in_sql], ["apple", "Banana"])
+        self.assertEqual([e.id for e in in_sql], [e.id for e in in_memory])
+
+    def test_sql_category_sort_reads_the_nocase_index(self):
+        # The collation-matched index orders the scan; only ties within a category are sorted
+        sql = "SELECT id FROM expenses" + db._order_by_clause([("category", True), ("value", False), ("id", True)])
+        plan = [row[-1] for row in db.get_connection().execute("EXPLAIN QUERY PLAN " + sql).fetchall()]
+        self.assertTrue(any("idx_expenses_category_nocase" in step for step in plan), plan)
+        self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,6 +2,7 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+import sqlite3
 import unittest
 from datetime import date, timedelta
 import db
@@ -46,5 +47,93 @@ class TestTrackerDBIntegration(unittest.TestCase):
         self.assertTrue(any(amount == 100 for amount in daily_totals.values()))
         self.assertTrue(any(amount == 50 for amount in daily_totals.values()))
 
+    def test_spending_by_category(self):
+        self.assertEqual(self.tracker.get_spending_by_category(),
+                         {"Food": 100, "Transport": 50, "Utilities": 200})
+
+    def test_total_expense_between(self):
+        today = date.today()
+        self.assertEqual(self.tracker.get_total_expense_between(today, today), 150)
+        self.assertEqual(self.tracker.get_total_expense_between(today - timedelta(days=8), today), 350)
+
+    def test_aggregate_by_week_keys_on_monday(self):
+        today = date.today()
+        monday = today - timedelta(days=today.weekday())
+        weekly = dict((key, total) for key, total, _ in db.aggregate_expenses("week"))
+        self.assertEqual(weekly[monday.toordinal()], 15000)  # Totals are in cents
+        self.assertEqual(self.tracker.get_spending_by_week()[monday.isoformat()], 150)
+
+    def test_aggregate_by_month_with_filter(self):
+        rows = db.aggregate_expenses("month", categories=["Food"])
+        self.assertEqual([(total, count) for _, total, count in rows], [(10000, 1)])
+
+    def test_find_expense_by_fields(self):
+        found = self.tracker.find_expense(50, "Transport", "Bus", date.today())
+        self.assertEqual((found.value, found.description), (50, "Bus"))
+        self.assertIsNone(self.tracker.find_expense(50, "Transport", "Taxi", date.today()))
+
+    def test_top_expenses_follow_writes_without_rebuild(self):
+        self.tracker.rebuild_expense_heap()
+        heap = self.tracker.expense_heap
+        expense_id = self.tracker.add_expense(500, "Other", "TV", date.today())
+        self.assertEqual(self.tracker.get_top_expenses(1)[0].id, expense_id)
+        self.tracker.delete_expense(self.tracker.get_top_expenses(1)[0])
+        self.assertEqual([e.value for e in self.tracker.get_top_expenses(2)], [200, 100])
+        # Still the same heap object: it was updated in place
+        self.assertIs(self.tracker.expense_heap, heap)
+
+    def test_top_expenses_recover_from_external_writes(self):
+        self.tracker.get_top_expenses(1)
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM expenses WHERE value_cents = 20000")
+        self.assertEqual([e.value for e in self.tracker.get_top_expenses(2)], [100, 50])
+
+    def test_live_indexes_follow_swaps_that_keep_the_count(self):
+        # Another connection swaps the largest expense for a smaller one
+        electricity = self.tracker.get_top_expenses(1)[0]
+        self.assertEqual(self.tracker.get_expense_rank(electricity), (1, 100 / 3))
+        self.tracker.get_budget_streaks(150)
+        other = sqlite3.connect(db.DB_FILE)
+        other.execute("DELETE FROM expenses WHERE id = ?", (electricity.id,))
+        other.execute("INSERT INTO expenses (value_cents, category, description, day) VALUES (7500, 'Food', 'Dinner', ?)",
+                      (date.today().toordinal(),))
+        other.commit()
+        other.close()
+        self.assertEqual([e.value for e in self.tracker.get_top_expenses(2)], [100, 75])
+        self.assertEqual(self.tracker.rank_index().kth_largest(1)[0], 100.0)
+        # Today now totals 225, over the 150 limit
+        self.assertEqual(self.tracker.get_budget_streaks(150)[0], 0)
+
+    def test_scoped_top_expenses_use_sql(self):
+        today = date.today()
+        self.tracker.add_expense(80, "Food", "Groceries", today)
+        top = self.tracker.get_top_expenses(5, categories=["Food"], start_date=today, end_date=today)
+        self.assertEqual([e.value for e in top], [100, 80])
+        plan = db.get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM expenses ORDER BY value_cents DESC, id DESC LIMIT 3"
+        ).fetchall()
+        self.assertTrue(any("idx_expenses_value" in row[-1] for row in plan))
+
+    def test_leaderboard_per_category(self):
+        self.tracker.add_expense(80, "Food", "Groceries", date.today())
+        self.tracker.add_expense(10, "Food", "Snack", date.today())
+        board = self.tracker.get_leaderboard("category", k=2)
+        self.assertEqual({key: [e.value for e in items] for key, items in board.items()},
+                         {"Food": [100, 80], "Transport": [50], "Utilities": [200]})
+
+    def test_expense_rank_follows_writes(self):
+        electricity = self.tracker.find_expense(200, "Utilities", "Electricity",
+                                                date.today() - timedelta(days=8))
+        self.assertEqual(self.tracker.get_expense_rank(electricity), (1, 100 / 3))
+        expense_id = self.tracker.add_expense(500, "Other", "Laptop", date.today())
+        self.assertEqual(self.tracker.get_expense_rank(electricity), (2, 50.0))
+        self.tracker.delete_expense(self.tracker.find_expense(500, "Other", "Laptop", date.today()))
+        self.assertEqual(self.tracker.rank_index().kth_largest(1), (200.0, electricity.id))
+        self.assertNotEqual(expense_id, electricity.id)
+
+    def test_aggregate_rejects_unknown_group(self):
+        with self.assertRaises(ValueError):
+            db.aggregate_expenses("decade")
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,16 +1,28 @@
+import os
+import tempfile
 import unittest
 from datetime import date, timedelta
+import db
 from models.tracker import FamilyExpenseTracker
 
 class TestBudgetCalculations(unittest.TestCase):
     def setUp(self):
-        # Setup tracker and add expenses to test budget calculations
+        # Setup tracker on its own database and add expenses to test budget calculations
+        self.original_db_file = db.DB_FILE
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db.DB_FILE = os.path.join(self.tmpdir.name, "budget.db")
+        db.init_db()
         self.tracker = FamilyExpenseTracker()
         today = date.today()
         self.tracker.add_expense(50, "Food", "Lunch", today - timedelta(days=15))  # within current month
         self.tracker.add_expense(100, "Food", "Dinner", today - timedelta(days=5))  # within last week
         self.tracker.add_expense(75, "Utilities", "Electricity", today - timedelta(days=1))  # within last week
 
+    def tearDown(self):
+        db.close_all_connections()
+        db.DB_FILE = self.original_db_file
+        self.tmpdir.cleanup()
+
     def test_total_expense_this_month(self):
         # Test that total expense for the month is calculated correctly
         total = self.tracker.get_total_expense_this_month()
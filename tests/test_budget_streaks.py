@@ -0,0 +1,71 @@
+import unittest
+import random
+from datetime import date, timedelta
+from models.budget_streaks import BudgetStreaks
+
+def brute_force(totals, limit, first_day, today):
+    # Reference answer: walk every day from the first expense to today
+    current = longest = 0
+    for day in range(first_day, today + 1):
+        current = current + 1 if totals.get(day, 0) <= limit else 0
+        longest = max(longest, current)
+    return current, longest
+
+class TestBudgetStreaks(unittest.TestCase):
+    def setUp(self):
+        self.start = date(2025, 5, 1)
+        self.day = lambda offset: (self.start + timedelta(days=offset)).toordinal()
+
+    def test_consecutive_runs(self):
+        # Over the 5000-cent limit on days 3 and 4; no expenses on days 1-2 and 6-9
+        engine = BudgetStreaks(5000, [(self.day(0), 1000, 1), (self.day(3), 6000, 2),
+                                      (self.day(4), 5001, 1), (self.day(5), 5000, 1)])
+        today = self.start + timedelta(days=9)
+        self.assertEqual(engine.current(today), 5)
+        self.assertEqual(engine.longest(today), 5)
+        self.assertEqual(engine.current(self.start + timedelta(days=4)), 0)
+        self.assertEqual(engine.longest(self.start + timedelta(days=4)), 3)
+
+    def test_incremental_updates_match_full_scan(self):
+        rng = random.Random(7)
+        engine = BudgetStreaks(5000)
+        totals = {}
+        today = self.start + timedelta(days=60)
+        for _ in range(300):
+            day = self.day(rng.randrange(-5, 60))
+            value = rng.choice([1500, 2500, 4000])
+            if rng.random() < 0.3 and totals.get(day, 0) >= value:
+                engine.add(day, -value, -1)
+                totals[day] -= value
+            else:
+                engine.add(day, value)
+                totals[day] = totals.get(day, 0) + value
+            first_day = min(totals)
+            self.assertEqual((engine.current(today), engine.longest(today)),
+                             brute_force(totals, 5000, first_day, today.toordinal()))
+
+    def test_future_expenses_do_not_count(self):
+        # Over-limit day 14 closes a run that ends after today (day 7)
+        engine = BudgetStreaks(5000, [(self.day(0), 1000, 1), (self.day(14), 9000, 1)])
+        self.assertEqual(engine.longest(self.start + timedelta(days=7)), 8)
+        self.assertEqual(engine.longest(self.start - timedelta(days=1)), 0)
+
+    def test_every_today_matches_full_scan(self):
+        # Same history, queried from before the first expense to after the last
+        rng = random.Random(11)
+        totals = {}
+        for _ in range(80):
+            day = self.day(rng.randrange(0, 60))
+            totals[day] = totals.get(day, 0) + rng.choice([1500, 2500, 4000])
+        engine = BudgetStreaks(5000, [(day, total, 1) for day, total in totals.items()])
+        for offset in range(-3, 65):
+            today = self.start + timedelta(days=offset)
+            self.assertEqual((engine.current(today), engine.longest(today)),
+                             brute_force(totals, 5000, min(totals), today.toordinal()))
+
+    def test_empty(self):
+        engine = BudgetStreaks(5000)
+        self.assertEqual((engine.current(), engine.longest()), (0, 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from datetime import date
+from models.date_index import DateRangeIndex
+
+class TestDateRangeIndex(unittest.TestCase):
+    def setUp(self):
+        # Daily totals for three days in May 2025
+        self.may = lambda day: date(2025, 5, day).toordinal()
+        self.index = DateRangeIndex([(self.may(1), 1000, 2), (self.may(15), 500, 1), (self.may(31), 250, 1)])
+
+    def test_range_totals(self):
+        self.assertEqual(self.index.totals(date(2025, 5, 1), date(2025, 5, 15)), (1500, 3))
+        self.assertEqual(self.index.sum(date(2025, 5, 2), date(2025, 5, 31)), 750)
+        self.assertEqual(self.index.count(), 4)
+        self.assertEqual(self.index.totals("2025-06-01", "2025-06-30"), (0, 0))
+        self.assertEqual(self.index.totals(date(2025, 5, 20), date(2025, 5, 10)), (0, 0))
+
+    def test_incremental_add_and_remove(self):
+        self.index.add(date(2025, 5, 15), 300)
+        self.index.remove(date(2025, 5, 1), 400)
+        self.assertEqual(self.index.totals(date(2025, 5, 1), date(2025, 5, 15)), (1400, 3))
+        self.assertEqual(len(self.index), 4)
+
+    def test_grows_to_cover_new_days(self):
+        self.index.add(date(2023, 1, 1), 100)
+        self.index.add(date(2030, 12, 31), 200)
+        self.assertEqual(self.index.totals(), (2050, 6))
+        self.assertEqual(self.index.sum(end_date=date(2024, 12, 31)), 100)
+        self.assertEqual(self.index.totals(date(2025, 5, 15), date(2025, 5, 15)), (500, 1))
+
+if __name__ == "__main__":
+    unittest.main()
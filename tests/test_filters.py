@@ -0,0 +1,38 @@
+import unittest
+from datetime import date
+from models.expense import Expense
+from utils.filters import FilterKey, filter_key, matches, narrows
+
+class TestFilterKey(unittest.TestCase):
+    def test_key_is_canonical(self):
+        # Category order does not change the key, and missing values are unbounded
+        a = filter_key({"categories": ["Other", "Food"], "min_amount": 0})
+        b = filter_key({"categories": ["Food", "Other"], "min_amount": 0})
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(a, FilterKey(None, None, ("Food", "Other"), 0, None))
+
+    def test_narrows(self):
+        base = filter_key({"start_date": date(2025, 5, 1), "end_date": date(2025, 5, 31),
+                           "categories": ["Food", "Utilities"], "min_amount": 0, "max_amount": 100})
+        tighter = base._replace(start_date=date(2025, 5, 10), categories=("Food",), max_amount=50)
+        self.assertTrue(narrows(tighter, base))
+        self.assertTrue(narrows(base, base))
+        # Widening any single field needs a new query
+        self.assertFalse(narrows(base._replace(end_date=date(2025, 6, 30)), base))
+        self.assertFalse(narrows(base._replace(categories=("Food", "Other")), base))
+        self.assertFalse(narrows(base._replace(min_amount=None), base))
+        # Anything narrows an unfiltered base
+        self.assertTrue(narrows(base, FilterKey(None, None, None, None, None)))
+
+    def test_matches(self):
+        expense = Expense(75, "Food", "Dinner", date(2025, 5, 20))
+        key = filter_key({"start_date": date(2025, 5, 1), "end_date": date(2025, 5, 20),
+                          "categories": ["Food"], "min_amount": 75, "max_amount": 75})
+        self.assertTrue(matches(expense, key))
+        self.assertFalse(matches(expense, key._replace(end_date=date(2025, 5, 19))))
+        self.assertFalse(matches(expense, key._replace(categories=("Other",))))
+        self.assertFalse(matches(expense, key._replace(max_amount=74.99)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
 from datetime import date
+from models.expense import Expense
+from models.heap_expenses import BoundedTopK, ExpenseHeap
 from models.tracker import FamilyExpenseTracker
 
 class TestHeap(unittest.TestCase):
@@ -16,5 +18,54 @@ class TestHeap(unittest.TestCase):
         top_values = sorted([e.value for e in top_expenses], reverse=True)
         self.assertEqual(top_values, [100, 75])  # Top two amounts
 
+class TestExpenseHeap(unittest.TestCase):
+    def setUp(self):
+        # Heap with five expenses valued 10..50 and ids 1..5
+        self.heap = ExpenseHeap()
+        for i in range(1, 6):
+            self.heap.push(Expense(i * 10, "Food", f"Item {i}", date(2025, 5, i), id=i))
+
+    def test_top_n_in_descending_order(self):
+        self.assertEqual([e.value for e in self.heap.get_top_n(3)], [50, 40, 30])
+        self.assertEqual(len(self.heap.get_top_n(10)), 5)
+
+    def test_remove_is_lazy_but_invisible(self):
+        self.heap.remove(5)
+        self.heap.remove(3)
+        self.assertEqual(len(self.heap), 3)
+        self.assertEqual(self.heap.peek().id, 4)
+        self.assertEqual([e.id for e in self.heap.get_top_n(3)], [4, 2, 1])
+
+    def test_push_again_supersedes_removed_entry(self):
+        self.heap.remove(5)
+        self.heap.push(Expense(5, "Food", "Cheaper", date(2025, 5, 5), id=5))
+        self.assertEqual(len(self.heap), 5)
+        self.assertEqual([e.id for e in self.heap.get_top_n(5)], [4, 3, 2, 1, 5])
+
+    def test_pop_skips_removed(self):
+        self.heap.remove(5)
+        self.assertEqual(self.heap.pop().id, 4)
+        self.assertEqual(len(self.heap), 3)
+
+    def test_compaction_keeps_contents(self):
+        for i in range(6, 200):
+            self.heap.push(Expense(i, "Other", "Filler", date(2025, 5, 1), id=i))
+        for i in range(6, 200):
+            self.heap.remove(i)
+        self.assertLess(len(self.heap.heap), 100)
+        self.assertEqual([e.id for e in self.heap.get_top_n(5)], [5, 4, 3, 2, 1])
+
+class TestBoundedTopK(unittest.TestCase):
+    def test_keeps_only_k_largest(self):
+        values = [5, 90, 20, 70, 10, 80]
+        expenses = [Expense(v, "Food", "", date(2025, 5, 1), id=i) for i, v in enumerate(values)]
+        top = BoundedTopK(3).extend(expenses)
+        self.assertEqual(len(top.heap), 3)
+        self.assertEqual([e.value for e in top.results()], [90, 80, 70])
+
+    def test_zero_k_keeps_nothing(self):
+        top = BoundedTopK(0).extend([Expense(1, "Food", "", date(2025, 5, 1))])
+        self.assertEqual(top.results(), [])
+
 if __name__ == "__main__":
     unittest.main()
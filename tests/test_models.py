@@ -0,0 +1,29 @@
+import unittest
+from datetime import date
+from models.expense import Expense
+from models.family_member import FamilyMember
+
+class TestModels(unittest.TestCase):
+    def test_expense_has_no_instance_dict(self):
+        expense = Expense(12.5, "Food", "Lunch", date(2025, 5, 15), id=1)
+        self.assertFalse(hasattr(expense, "__dict__"))
+        with self.assertRaises(AttributeError):
+            expense.note = "not a field"
+
+    def test_batch_factory_matches_single_row_factory(self):
+        rows = [(1, 1250, "Food", "Lunch", date(2025, 5, 15).toordinal(), None),
+                (2, 999, "Transport", "Bus", date(2025, 5, 16).toordinal(), 3)]
+        expected = [str(Expense.from_storage_row(row)) for row in rows]
+        self.assertEqual([str(expense) for expense in Expense.from_storage_rows(rows)], expected)
+        self.assertEqual(Expense.from_storage_rows([]), [])
+
+    def test_member_batch_factory(self):
+        rows = [(1, "Alice", 1, 4000), (2, "Bob", 0, 0)]
+        members = FamilyMember.from_db_rows(rows)
+        self.assertEqual([str(member) for member in members],
+                         [str(FamilyMember.from_db_row(row)) for row in rows])
+        self.assertIs(members[1].earning_status, False)
+        self.assertFalse(hasattr(members[0], "__dict__"))
+
+if __name__ == "__main__":
+    unittest.main()
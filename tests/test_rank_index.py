@@ -0,0 +1,37 @@
+import unittest
+from datetime import date
+from models.expense import Expense
+from models.rank_index import ExpenseRankIndex
+
+class TestExpenseRankIndex(unittest.TestCase):
+    def setUp(self):
+        # Index over ten expenses valued 10..100 with ids 1..10
+        self.index = ExpenseRankIndex(
+            Expense(i * 10, "Food", f"Item {i}", date(2025, 5, i), id=i) for i in range(1, 11))
+
+    def test_rank_and_percentiles(self):
+        self.assertEqual(self.index.rank(Expense(100, "Food", "", date(2025, 5, 1))), 1)
+        self.assertEqual(self.index.rank(Expense(70, "Food", "", date(2025, 5, 1))), 4)
+        self.assertEqual(self.index.percentile(30), 30.0)
+        self.assertEqual(self.index.top_percent(90), 20.0)
+
+    def test_kth_largest_and_count_between(self):
+        self.assertEqual(self.index.kth_largest(1), (100.0, 10))
+        self.assertEqual(self.index.kth_largest(3), (80.0, 8))
+        self.assertIsNone(self.index.kth_largest(11))
+        self.assertEqual(self.index.count_between(25, 60), 4)
+        self.assertEqual(self.index.count_between(60, 25), 0)
+
+    def test_stays_in_sync_with_add_and_remove(self):
+        self.index.remove(10)
+        self.index.add(Expense(55, "Food", "Extra", date(2025, 5, 11), id=11))
+        self.assertEqual(len(self.index), 10)
+        self.assertEqual(self.index.kth_largest(1), (90.0, 9))
+        self.assertEqual(self.index.count_between(50, 60), 3)
+        # Re-adding an id replaces its old value instead of duplicating it
+        self.index.add(Expense(5, "Food", "Cheaper", date(2025, 5, 11), id=11))
+        self.assertEqual(len(self.index), 10)
+        self.assertEqual(self.index.count_between(50, 60), 2)
+
+if __name__ == "__main__":
+    unittest.main()
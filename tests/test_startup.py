@@ -0,0 +1,56 @@
+# test_startup.py
+# Startup benchmark: importing the app's page modules must stay cheap and must
+# not pull in the plotting/data stack, which pages load only when they need it.
+
+import importlib.util
+import os
+import subprocess
+import sys
+import unittest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules app.py imports at load time (besides streamlit itself)
+APP_MODULES = ["db", "models.tracker", "ui.member_form", "ui.expense_form",
+               "ui.overview", "ui.visualization", "ui.top_expenses", "ui.filter_form"]
+
+# Heavy modules that must stay unloaded until a page uses them
+DEFERRED_MODULES = ["matplotlib", "seaborn", "pandas", "plotly", "pyarrow"]
+
+# Cumulative import time allowed for APP_MODULES, in microseconds
+IMPORT_BUDGET_US = 1_500_000
+
+@unittest.skipUnless(importlib.util.find_spec("streamlit"), "streamlit is not installed")
+class TestStartupImports(unittest.TestCase):
+    def _import_app_modules(self):
+        # Import streamlit first, then the app modules, in a fresh interpreter with
+        # -X importtime; report which deferred modules the app modules added
+        code = (
+            "import sys, streamlit\n"
+            "before = set(sys.modules)\n"
+            f"for name in {APP_MODULES!r}:\n"
+            "    __import__(name)\n"
+            f"print(sorted(n for n in {DEFERRED_MODULES!r} if n in sys.modules and n not in before))\n"
+        )
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                cwd=REPO_ROOT, capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        return result
+
+    def test_plotting_stack_is_not_imported_at_startup(self):
+        result = self._import_app_modules()
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_app_import_budget(self):
+        # importtime lines: "import time: self [us] | cumulative | imported package"
+        result = self._import_app_modules()
+        total = 0
+        for line in result.stderr.splitlines():
+            parts = line.split("|")
+            # Only top-level (unindented) entries, so nested imports are not counted twice
+            if len(parts) == 3 and not parts[2].startswith("  ") and parts[2].strip() in APP_MODULES:
+                total += int(parts[1])
+        self.assertLess(total, IMPORT_BUDGET_US)
+
+if __name__ == "__main__":
+    unittest.main()
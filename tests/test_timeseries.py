@@ -0,0 +1,38 @@
+import unittest
+from datetime import date
+from utils.timeseries import bucket_count, bucket_starts, bucket_totals, choose_bucket
+
+class TestTimeSeries(unittest.TestCase):
+    def test_choose_bucket_from_range(self):
+        start = date(2025, 1, 1).toordinal()
+        self.assertEqual(choose_bucket(start, start + 30), "day")
+        self.assertEqual(choose_bucket(start, start + 365), "week")
+        self.assertEqual(choose_bucket(start, start + 5 * 365), "month")
+        self.assertEqual(choose_bucket(start, start + 20 * 365), "quarter")
+        self.assertEqual(choose_bucket(start, start + 100 * 365), "year")
+        self.assertEqual(choose_bucket(start, start + 365, max_points=400), "day")
+
+    def test_choose_bucket_counts_partial_edge_buckets(self):
+        # Both ranges fit in 120 buckets by length, but not once aligned to the calendar
+        start = date(2015, 1, 31).toordinal()
+        self.assertEqual(bucket_count(start, start + 3651, "month"), 121)
+        self.assertEqual(choose_bucket(start, start + 3651), "quarter")
+        start = date(2025, 5, 18).toordinal()  # A Sunday
+        self.assertEqual(bucket_count(start, start + 839, "week"), 121)
+        self.assertEqual(choose_bucket(start, start + 839), "month")
+
+    def test_bucket_starts(self):
+        day = date(2025, 5, 15).toordinal()  # A Thursday
+        self.assertEqual(int(bucket_starts([day], "week")[0]), date(2025, 5, 12).toordinal())
+        self.assertEqual(int(bucket_starts([day], "month")[0]), date(2025, 5, 1).toordinal())
+        self.assertEqual(int(bucket_starts([day], "quarter")[0]), date(2025, 4, 1).toordinal())
+        self.assertEqual(int(bucket_starts([day], "year")[0]), date(2025, 1, 1).toordinal())
+
+    def test_bucket_totals(self):
+        days = [date(2025, 1, 31).toordinal(), date(2025, 2, 1).toordinal(), date(2025, 2, 28).toordinal()]
+        starts, totals = bucket_totals(days, [100, 250, 5], "month")
+        self.assertEqual(starts.tolist(), [date(2025, 1, 1).toordinal(), date(2025, 2, 1).toordinal()])
+        self.assertEqual(totals.tolist(), [100, 255])
+
+if __name__ == "__main__":
+    unittest.main()
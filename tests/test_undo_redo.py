@@ -1,31 +1,34 @@
+import os
+import tempfile
 import unittest
 from datetime import date
+import db
 from models.tracker import FamilyExpenseTracker
-from utils.actions import Action
 
 class TestUndoRedo(unittest.TestCase):
     def setUp(self):
-        # Setup tracker and empty undo/redo stacks for each test
+        # Setup tracker on its own database, so the undo log starts empty
+        self.original_db_file = db.DB_FILE
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db.DB_FILE = os.path.join(self.tmpdir.name, "undo.db")
+        db.init_db()
         self.tracker = FamilyExpenseTracker()
-        self.undo_stack = []
-        self.redo_stack = []
+
+    def tearDown(self):
+        db.close_all_connections()
+        db.DB_FILE = self.original_db_file
+        self.tmpdir.cleanup()
 
     def test_undo_add_expense(self):
         # Simulate adding an expense and then undoing it
         expense_data = {"value": 50, "category": "Food", "description": "Lunch", "date": date(2025,5,15)}
-        action = Action("add_expense", expense_data)
-        self.undo_stack.append(action)
-        self.tracker.add_expense(**expense_data)
+        self.tracker.add_expense(**expense_data, undoable=True)
 
-        # Undo the addition by removing the expense
-        last_action = self.undo_stack.pop()
-        if last_action.action_type == "add_expense":
-            for exp in self.tracker.expense_list:
-                if (exp.value == last_action.item["value"] and exp.category == last_action.item["category"]):
-                    self.tracker.delete_expense(exp)
-                    break
+        # Undo the addition; the expense is removed by id
+        self.assertEqual(self.tracker.undo(), "add_expense")
 
-        self.assertEqual(len(self.tracker.expense_list), 0)  # Expense list should be empty after undo
+        # Expense list should be empty after undo
+        self.assertEqual(self.tracker.filter_expenses(None, None, None, None, None), [])
 
 if __name__ == "__main__":
     unittest.main()
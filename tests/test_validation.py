@@ -6,7 +6,9 @@ from utils.validation import (
     validate_member_name,
     validate_earnings,
     validate_expense_value,
-    validate_category
+    validate_category,
+    validate_expense_rows,
+    validate_member_columns
 )
 
 class TestValidation(unittest.TestCase):
@@ -47,6 +49,29 @@ class TestValidation(unittest.TestCase):
         with self.assertRaises(ValueError):
             validate_category("   ")
 
+    def test_batch_expense_report(self):
+        # Every bad row is reported with its index instead of raising
+        rows = [
+            (10, "Food", "Lunch", "2025-05-15"),
+            (0, "Food", "Free", "2025-05-15"),
+            ("12", " ", "Typo", "2025-13-01"),
+            (5, "Pets", "Vet", "2025-05-16", None),
+            (5, "Food"),
+        ]
+        report = validate_expense_rows(rows, allowed_categories=["Food", "Utilities"])
+        self.assertFalse(report.ok)
+        self.assertEqual(report.valid_indices(), [0])
+        self.assertEqual([(row, field) for row, field, _ in report.errors],
+                         [(1, "value"), (2, "value"), (2, "category"), (2, "date"),
+                          (3, "category"), (4, "row")])
+        self.assertEqual(report.select(rows), [rows[0]])
+
+    def test_batch_member_report(self):
+        report = validate_member_columns(["Ann", "", "Bob"], [100, 5, -1])
+        self.assertEqual(report.valid.tolist(), [True, False, False])
+        self.assertEqual([reason for _, _, reason in report.errors],
+                         ["Name cannot be empty.", "Earnings cannot be negative."])
+
 # Entry point for test execution
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,54 @@
+# cache.py
+# Streamlit caching for the UI pages. Every widget interaction reruns the whole
+# script, so query results and chart images are cached across reruns and
+# sessions, keyed by the database's write generation: a rerun that only moves
+# a date picker reuses them, and any committed write makes them stale.
+
+import streamlit as st
+import db
+from models.family_member import FamilyMember
+from models.tracker import FamilyExpenseTracker
+from utils.export import export_expenses
+
+def data_version():
+    """
+    Cheap token for the current state of the data (see db.data_generation).
+    Pass it to every cached function so a write invalidates its results.
+    """
+    return db.data_generation()
+
+@st.cache_resource
+def shared_tracker():
+    # One tracker used only for the cached read-only queries below
+    return FamilyExpenseTracker()
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _tracker_query(version, method, args, kwargs):
+    return getattr(shared_tracker(), method)(*args, **dict(kwargs))
+
+def cached_query(method, *args, **kwargs):
+    """
+    Call a read-only FamilyExpenseTracker method, e.g.
+    cached_query("get_total_expense_between", week_start, week_end),
+    reusing its result until the data version changes.
+    """
+    return _tracker_query(data_version(), method, args, tuple(sorted(kwargs.items())))
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _family_members(version):
+    return FamilyMember.from_db_rows(db.get_family_members())
+
+def family_members():
+    # Family members as FamilyMember objects, cached per data version
+    return _family_members(data_version())
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _export(version, export_format, filters):
+    return export_expenses(export_format, **dict(filters))
+
+def cached_export(export_format, **filters):
+    """
+    Export bytes of the expense table (see utils.export.export_expenses),
+    generated once per data version, format and filters rather than on every rerun.
+    """
+    return _export(data_version(), export_format, tuple(sorted(filters.items())))
@@ -6,7 +6,6 @@
 import streamlit as st
 from utils.validation import validate_expense_value, validate_category 
 from utils.logger import logger  
-from utils.actions import Action 
 
 def render_expense_form(session_state):
     # Section title
@@ -36,28 +35,12 @@ def render_expense_form(session_state):
                 validate_expense_value(expense_value)
                 validate_category(expense_category)
 
-                # Add the expense to the tracker 
+                # Add the expense to the tracker, logged in the same commit for undo/redo
                 session_state.expense_tracker.add_expense(
-                    expense_value, expense_category, expense_description, expense_date
+                    expense_value, expense_category, expense_description, expense_date,
+                    undoable=True
                 )
 
-                # Create an action object representing this addition for undo/redo
-                action = Action(action_type="add_expense", item={
-                    "value": expense_value,
-                    "category": expense_category,
-                    "description": expense_description,
-                    "date": expense_date
-                })
-                # Push the action onto the undo stack
-                session_state.undo_stack.append(action)
-
-                # Clear the redo stack as new action invalidates future redos
-                session_state.redo_stack.clear()
-
-                # Clear cached expense list in tracker so UI reloads fresh data from DB
-                if hasattr(session_state.expense_tracker, 'expense_list'):
-                    session_state.expense_tracker.expense_list = []
-
                 # Show success message to user
                 st.success("Expense added!")
 
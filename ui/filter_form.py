@@ -1,7 +1,17 @@
 import streamlit as st
 from datetime import datetime, timedelta
+from ui.cache import cached_query, data_version
+from utils.filters import filter_key, matches, narrows
+
+# Newest first, matching the unfiltered expense table
+FILTER_ORDER = [("date", False), ("id", False)]
 
 def render_filter_form(session_state):
+    """
+    Show the filter controls and return the applied filters dict, or None
+    while filtering is off. Inputs sit in a form, so editing a field does
+    not rerun anything until the filters are applied.
+    """
     st.markdown("###### 🔎 Filter Expenses")
 
     # Define default values for filters, used on reset or initial load
@@ -11,52 +21,91 @@ def render_filter_form(session_state):
     default_min_amount = 0
     default_max_amount = 10000
 
-    # Create columns for horizontal layout with specified relative widths
-    col_reset, col_start, col_end, col_cat, col_min, col_max = st.columns([2, 2, 2, 4, 1.5, 1.5])
-
-    # Place the Reset Filters button in the first column
-    with col_reset:
-        if st.button("Reset Filters"):
-            # Reset filter values in session state to defaults
-            session_state.filters = {
-                "start_date": default_start,
-                "end_date": default_end,
-                "categories": default_categories,
-                "min_amount": default_min_amount,
-                "max_amount": default_max_amount,
-            }
-            # Refresh the app immediately to update UI with reset values
-            st.experimental_rerun()
+    enabled = st.checkbox("Filter expenses", key="filters_enabled")
+    if not enabled:
+        return None
 
     # Retrieve current filter values from session state or empty dict if none set
     filters = session_state.filters if "filters" in session_state else {}
 
-    # Date input for start date placed in second column
-    with col_start:
-        start_date = st.date_input("Start Date", value=filters.get("start_date", default_start))
+    with st.form("filter_form"):
+        # Create columns for horizontal layout with specified relative widths
+        col_start, col_end, col_cat, col_min, col_max = st.columns([2, 2, 4, 1.5, 1.5])
+
+        # Date input for start date placed in first column
+        with col_start:
+            start_date = st.date_input("Start Date", value=filters.get("start_date", default_start))
+
+        # Date input for end date placed in second column
+        with col_end:
+            end_date = st.date_input("End Date", value=filters.get("end_date", default_end))
+
+        # Multi-select for categories placed in wider third column
+        with col_cat:
+            selected_categories = st.multiselect("Categories", default_categories, default=filters.get("categories", default_categories))
 
-    # Date input for end date placed in third column
-    with col_end:
-        end_date = st.date_input("End Date", value=filters.get("end_date", default_end))
+        # Numeric input for minimum amount placed in fourth column
+        with col_min:
+            min_amount = st.number_input("Min Amount", min_value=0, value=filters.get("min_amount", default_min_amount))
 
-    # Multi-select for categories placed in wider fourth column
-    with col_cat:
-        selected_categories = st.multiselect("Categories", default_categories, default=filters.get("categories", default_categories))
+        # Numeric input for maximum amount placed in fifth column
+        with col_max:
+            max_amount = st.number_input("Max Amount", min_value=0, value=filters.get("max_amount", default_max_amount))
 
-    # Numeric input for minimum amount placed in fifth column
-    with col_min:
-        min_amount = st.number_input("Min Amount", min_value=0, value=filters.get("min_amount", default_min_amount))
+        col_apply, col_reset = st.columns([1, 1])
+        with col_apply:
+            applied = st.form_submit_button("Apply Filters")
+        with col_reset:
+            reset = st.form_submit_button("Reset Filters")
 
-    # Numeric input for maximum amount placed in sixth column
-    with col_max:
-        max_amount = st.number_input("Max Amount", min_value=0, value=filters.get("max_amount", default_max_amount))
+    if reset:
+        # Reset filter values in session state to defaults
+        session_state.filters = {
+            "start_date": default_start,
+            "end_date": default_end,
+            "categories": default_categories,
+            "min_amount": default_min_amount,
+            "max_amount": default_max_amount,
+        }
+        # Refresh the app immediately to update UI with reset values
+        st.experimental_rerun()
+    elif applied or "filters" not in session_state:
+        # Update session state filters with current input values
+        session_state.filters = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "categories": selected_categories,
+            "min_amount": min_amount,
+            "max_amount": max_amount,
+        }
+    return session_state.filters
 
-    # Update session state filters with current input values
-    session_state.filters = {
-        "start_date": start_date,
-        "end_date": end_date,
-        "categories": selected_categories,
-        "min_amount": min_amount,
-        "max_amount": max_amount,
-    }
+def get_filtered_expenses(session_state, filters):
+    """
+    The expenses matching filters, newest first, shared by every page in a rerun.
 
+    Each distinct filter key is one indexed query, memoized across reruns by
+    key and data version. When the new filter is narrower than the last
+    queried one (a tighter date range, fewer categories, ...), the result is
+    filtered from those rows in memory and no query runs at all.
+    """
+    key = filter_key(filters)
+    if key.categories == ():
+        return []  # Nothing selected, so nothing matches; skip the query
+    version = data_version()
+    view = session_state.get("filtered_view")
+    if view is not None and view["version"] == version:
+        if view["key"] == key:
+            return view["expenses"]
+        base_key, base_expenses = view["base"]
+        if narrows(key, base_key):
+            expenses = [expense for expense in base_expenses if matches(expense, key)]
+            session_state.filtered_view = {"version": version, "key": key,
+                                           "expenses": expenses, "base": view["base"]}
+            return expenses
+    expenses = cached_query("filter_expenses", key.start_date, key.end_date,
+                            list(key.categories) if key.categories is not None else None,
+                            key.min_amount, key.max_amount, order_by=FILTER_ORDER)
+    session_state.filtered_view = {"version": version, "key": key,
+                                   "expenses": expenses, "base": (key, expenses)}
+    return expenses
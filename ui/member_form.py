@@ -6,7 +6,6 @@
 import streamlit as st
 from utils.validation import validate_member_name, validate_earnings  # Validation functions for input
 from utils.logger import logger  # Logger for tracking form actions
-from utils.actions import Action  # For undo/redo action tracking
 
 def render_member_form(session_state):
     # Section title
@@ -40,29 +39,12 @@ def render_member_form(session_state):
                 validate_member_name(member_name)
                 validate_earnings(earnings)
 
-                # Add the new family member via tracker method which saves to DB
+                # Add the new family member via tracker method which saves to DB,
+                # recording it in the undo/redo command log in the same commit
                 session_state.expense_tracker.add_family_member(
-                    member_name, earning_status, earnings
+                    member_name, earning_status, earnings, undoable=True
                 )
 
-                # Record this addition as an undoable action
-                action = Action(
-                    action_type="add_member",
-                    item={
-                        "name": member_name,
-                        "earning_status": earning_status,
-                        "earnings": earnings,
-                    }
-                )
-                # Push the action onto the undo stack
-                session_state.undo_stack.append(action)
-                # Clear redo stack since new action invalidates future redos
-                session_state.redo_stack.clear()
-
-                # Clear cached members list in tracker to force UI refresh from DB
-                if hasattr(session_state.expense_tracker, 'members'):
-                    session_state.expense_tracker.members = []
-
                 # Show confirmation message to user
                 st.success("Family member added!")
 
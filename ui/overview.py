@@ -4,11 +4,9 @@
 # and calculates totals for income, expenses, and the remaining balance.
 
 import streamlit as st
-import db
 from datetime import datetime, timedelta
-from utils.actions import Action
-from models.family_member import FamilyMember
-from models.expense import Expense
+from models.expense_sorter import ExpenseSorter
+from ui.cache import cached_query, family_members
 
 def get_week_range(selected_date):
     """Calculate Monday and Sunday of the week for a given date."""
@@ -26,77 +24,158 @@ def get_month_range(selected_date):
     end_of_month = next_month - timedelta(days=1)
     return start_of_month, end_of_month
 
-def render_overview(session_state, filtered_expenses=None):
+# Number of expenses shown per page in the expense table
+EXPENSE_PAGE_SIZE = 25
+
+def load_expense_page(session_state, filtered_expenses=None):
+    """
+    Load the current page of expenses, newest first.
+    Unfiltered pages come from a keyset query on (day, id), so only one page
+    of rows is read. A filtered list is already in memory and is sliced.
+    Returns (page, has_newer, has_older).
+    """
+    if filtered_expenses is not None:
+        offset = session_state.get("filtered_page_offset", 0)
+        if offset >= len(filtered_expenses):
+            offset = 0
+        page = filtered_expenses[offset:offset + EXPENSE_PAGE_SIZE]
+        return page, offset > 0, offset + EXPENSE_PAGE_SIZE < len(filtered_expenses)
+
+    direction, key = session_state.get("expense_page", (None, None))
+    # Pages are cached per data version, so reruns that don't move the page are free
+    if direction == "after":
+        page, has_newer = cached_query("get_expense_page", EXPENSE_PAGE_SIZE, after=key)
+        if not has_newer:
+            # Reached the newest rows; show the regular first page instead
+            session_state.expense_page = (None, None)
+            page, has_older = cached_query("get_expense_page", EXPENSE_PAGE_SIZE)
+            return page, False, has_older
+        return page, True, True
+    page, has_older = cached_query("get_expense_page", EXPENSE_PAGE_SIZE, before=key)
+    if not page and key is not None:
+        # The page emptied (e.g. after deletes); fall back to the newest page
+        session_state.expense_page = (None, None)
+        page, has_older = cached_query("get_expense_page", EXPENSE_PAGE_SIZE)
+        return page, False, has_older
+    return page, key is not None, has_older
+
+def move_expense_page(session_state, page, filtered_expenses, newer):
+    """Point the page state at the page above (newer) or below (older) the current one."""
+    if filtered_expenses is not None:
+        offset = session_state.get("filtered_page_offset", 0)
+        step = -EXPENSE_PAGE_SIZE if newer else EXPENSE_PAGE_SIZE
+        session_state.filtered_page_offset = max(0, offset + step)
+    elif newer:
+        session_state.expense_page = ("after", (page[0].date.toordinal(), page[0].id))
+    else:
+        session_state.expense_page = ("before", (page[-1].date.toordinal(), page[-1].id))
+
+# Sort choices for a filtered expense list: label -> sort keys for tracker.sort_expenses
+EXPENSE_SORT_CHOICES = {
+    "Newest first": [("Date", False)],
+    "Amount (high to low)": [("Amount", False), ("Date", False)],
+    "Category, then amount": [("Category", True), ("Amount", False)],
+}
+
+def sort_filtered_expenses(session_state, filtered_expenses):
+    """
+    Order a filtered list by the chosen sort keys. The ExpenseSorter for the
+    list is kept in session state, so switching the sort option reuses its
+    precomputed keys and orders instead of sorting again.
+    """
+    choice = st.selectbox("Sort by", list(EXPENSE_SORT_CHOICES), key="expense_sort_choice")
+    sorter = session_state.get("expense_sorter")
+    if sorter is None or sorter.expenses is not filtered_expenses:
+        sorter = session_state.expense_sorter = ExpenseSorter(filtered_expenses)
+    return session_state.expense_tracker.sort_expenses(sorter, EXPENSE_SORT_CHOICES[choice])
+
+def render_expense_table(session_state, page):
+    """
+    Show one page of expenses in a single table widget with a selection column,
+    and delete the selected rows together with one button.
+    """
+    import pandas as pd
+
     tracker = session_state.expense_tracker
+    table = pd.DataFrame({
+        "Delete": [False] * len(page),
+        "Date": [expense.date for expense in page],
+        "Category": [expense.category for expense in page],
+        "Amount": [expense.value for expense in page],
+        "Description": [expense.description for expense in page],
+    })
+    edited = st.data_editor(
+        table,
+        column_config={"Delete": st.column_config.CheckboxColumn("Delete", default=False)},
+        disabled=["Date", "Category", "Amount", "Description"],
+        hide_index=True,
+        use_container_width=True,
+        key=f"expense_table_{page[0].id}_{page[-1].id}",
+    )
+    selected = [expense for expense, chosen in zip(page, edited["Delete"]) if chosen]
 
-    # Load family members from DB if not cached
-    if not hasattr(tracker, 'members') or not tracker.members:
-        db_members = db.get_family_members()
-        tracker.members = [FamilyMember.from_db_row(row) for row in db_members]
+    if st.button(f"🗑️ Delete selected ({len(selected)})", disabled=not selected, key="delete_selected_expenses"):
+        # One commit for the whole selection
+        with tracker.batch():
+            for expense in selected:
+                # Each delete is logged by id and can be undone on its own
+                tracker.delete_expense(expense, undoable=True)
+        st.experimental_rerun()
 
-    members = tracker.members
+def render_overview(session_state, filtered_expenses=None):
+    tracker = session_state.expense_tracker
+
+    # Family members, cached per data version so writes from any session show up
+    members = family_members()
 
     st.markdown("### 👥 Family Members")
     if members:
-        for idx, member in enumerate(members):
+        for member in members:
             col1, col2 = st.columns([8, 1])
             with col1:
                 st.write(f"👤 **{member.name}** — ${member.earnings} ({'Earning' if member.earning_status else 'Not Earning'})")
             with col2:
-                if st.button("❌", key=f"del_member_{idx}"):
-                    action = Action(
-                        action_type="delete_member",
-                        item={
-                            "name": member.name,
-                            "earning_status": member.earning_status,
-                            "earnings": member.earnings
-                        }
-                    )
-                    session_state.undo_stack.append(action)
-                    session_state.redo_stack.clear()
-                    tracker.delete_family_member(member)
-                    tracker.members = []  # Clear cache to reload fresh data next render
+                if st.button("❌", key=f"del_member_{member.id}"):
+                    tracker.delete_family_member(member, undoable=True)
                     st.experimental_rerun()
     else:
         st.info("No family members added yet.")
 
-    # Load expenses from DB if not cached and no filtered_expenses provided
-    if filtered_expenses is None:
-        if not hasattr(tracker, 'expense_list') or not tracker.expense_list:
-            db_expenses = db.get_expenses()
-            tracker.expense_list = [Expense.from_db_row(row) for row in db_expenses]
-        filtered_expenses = tracker.expense_list
+    showing_all = filtered_expenses is None
 
     st.markdown("### 💼 All Expenses")
-    if filtered_expenses:
-        for idx, expense in enumerate(filtered_expenses):
-            col1, col2 = st.columns([9, 1])
-            with col1:
-                st.write(f"🗓️ {expense.date} — **{expense.category}** — ${expense.value} ({expense.description})")
-            with col2:
-                if st.button("❌", key=f"del_expense_{idx}"):
-                    action = Action(
-                        action_type="delete_expense",
-                        item={
-                            "value": expense.value,
-                            "category": expense.category,
-                            "description": expense.description,
-                            "date": expense.date
-                        }
-                    )
-                    session_state.undo_stack.append(action)
-                    session_state.redo_stack.clear()
-                    tracker.delete_expense(expense)
-                    tracker.rebuild_expense_heap()
-                    tracker.expense_list = []  # Clear cache
-                    st.experimental_rerun()
+    if filtered_expenses is not None:
+        filtered_expenses = sort_filtered_expenses(session_state, filtered_expenses)
+    page, has_newer, has_older = load_expense_page(session_state, filtered_expenses)
+    if page:
+        render_expense_table(session_state, page)
+
+        # Next/previous controls move the page key instead of loading more rows
+        col_prev, col_info, col_next = st.columns([1, 4, 1])
+        with col_prev:
+            if st.button("⬅️ Newer", disabled=not has_newer, key="expense_page_newer"):
+                move_expense_page(session_state, page, filtered_expenses, newer=True)
+                st.experimental_rerun()
+        with col_info:
+            if showing_all:
+                st.caption(f"Showing {len(page)} expenses from {page[-1].date} to {page[0].date}")
+            else:
+                st.caption(f"Showing {len(page)} of {len(filtered_expenses)} filtered expenses")
+        with col_next:
+            if st.button("Older ➡️", disabled=not has_older, key="expense_page_older"):
+                move_expense_page(session_state, page, filtered_expenses, newer=False)
+                st.experimental_rerun()
     else:
         st.info("No expenses recorded yet.")
 
     # Financial Summary
     st.markdown("### 📈 Financial Summary")
-    total_earnings = tracker.calculate_total_earnings()
-    total_expenses = sum(expense.value for expense in filtered_expenses)
+    total_earnings = cached_query("calculate_total_earnings")
+    # Unfiltered totals come straight from the rollup tables
+    if showing_all:
+        total_expenses = cached_query("calculate_total_expenditure")
+    else:
+        total_expenses = sum(expense.value for expense in filtered_expenses)
     balance = total_earnings - total_expenses
 
     col1, col2, col3 = st.columns(3)
@@ -115,7 +194,7 @@ def render_overview(session_state, filtered_expenses=None):
 
     week_start, week_end = get_week_range(selected_week_date)
     weekly_limit = session_state.weekly_budget_limit
-    weekly_total = sum(expense.value for expense in tracker.expense_list if week_start <= expense.date <= week_end)
+    weekly_total = cached_query("get_total_expense_between", week_start, week_end)
     remaining = weekly_limit - weekly_total
 
     st.markdown(f"🗓️ **Tracking expenses from:** {week_start.strftime('%A, %b %d')} — {week_end.strftime('%A, %b %d')}")
@@ -145,7 +224,7 @@ def render_overview(session_state, filtered_expenses=None):
 
     month_start, month_end = get_month_range(selected_month_date)
     monthly_limit = session_state.monthly_budget_limit
-    monthly_total = sum(expense.value for expense in tracker.expense_list if month_start <= expense.date <= month_end)
+    monthly_total = cached_query("get_total_expense_between", month_start, month_end)
     remaining_monthly = monthly_limit - monthly_total
 
     st.markdown(f"🗓️ **Tracking expenses from:** {month_start.strftime('%A, %b %d')} — {month_end.strftime('%A, %b %d')}")
@@ -168,10 +247,12 @@ def render_overview(session_state, filtered_expenses=None):
 
     # Budget Performance Gamification
     st.markdown("### 🏆 Budget Performance")
-    spending_by_date = tracker.get_spending_by_date()
-    daily_budget_limit = 50
-    under_budget_days = [date for date, total in spending_by_date.items() if total <= daily_budget_limit]
-    streak = len(under_budget_days)
+    # The widget keeps its value in session_state.daily_budget_limit across reruns
+    daily_budget_limit = st.number_input("Daily budget limit ($)", min_value=0, value=50,
+                                         step=5, key="daily_budget_limit")
+    # Consecutive days at or under the limit, from the incremental streak engine
+    streak, longest_streak = cached_query("get_budget_streaks", daily_budget_limit, datetime.today().date())
+    st.caption(f"Longest streak so far: {longest_streak} days")
 
     if "streak_badge_shown" not in session_state:
         session_state.streak_badge_shown = False
@@ -179,13 +260,13 @@ def render_overview(session_state, filtered_expenses=None):
     if streak >= 3:
         if not session_state.streak_badge_shown:
             st.balloons()
-            st.success(f"🔥 Amazing! You've had {streak} days under ${daily_budget_limit}!")
+            st.success(f"🔥 Amazing! You've had {streak} days in a row under ${daily_budget_limit}!")
             st.markdown("🏅 **You’ve earned the 'Budget Boss' badge!**")
             session_state.streak_badge_shown = True
         else:
             st.info(f"🏅 You're still holding your Budget Boss badge with {streak} great days!")
     elif streak > 0:
-        st.info(f"👍 You're doing well! {streak} days under your daily budget.")
+        st.info(f"👍 You're doing well! {streak} days in a row under your daily budget.")
         session_state.streak_badge_shown = False
     else:
         st.warning("💸 Let's aim to stay under budget tomorrow!")
@@ -1,37 +1,68 @@
 import streamlit as st
-from datetime import datetime
-from models.expense import Expense
+from datetime import datetime, timedelta
+from ui.cache import cached_query
 
-def render_top_expenses(session_state, n=3):
+# Period choices for the top expenses leaderboard
+TOP_EXPENSE_PERIODS = ["All time", "This week", "This month"]
+
+def get_period_range(period, today=None):
+    """Return (start_date, end_date) for a period choice, or (None, None) for all time."""
+    today = today or datetime.today().date()
+    if period == "This week":
+        return today - timedelta(days=today.weekday()), today
+    if period == "This month":
+        return today.replace(day=1), today
+    return None, None
+
+def render_top_expenses(session_state, n=3, filtered_expenses=None):
     """
     Displays the top N expenses in the Family Expense Tracker.
-    
+
     Parameters:
     - session_state: Streamlit's session state holding the tracker object.
     - n: Number of top expenses to display (default is 3).
+    - filtered_expenses: The shared filtered view, if a filter is applied.
     """
     tracker = session_state.expense_tracker
-    
-    # Get raw expense tuples from DB, convert to Expense objects for UI
-    db_expenses = tracker.db.get_expenses() if hasattr(tracker, 'db') else []
-    # Build Expense objects for all expenses
-    expenses = [
-        Expense(value=row[1], category=row[2], description=row[3], date=datetime.fromisoformat(row[4]).date()) 
-        for row in db_expenses
-    ]
-
-    # Refresh the heap with current data and get top N expenses
-    tracker.expense_heap = tracker.expense_heap or ExpenseHeap()
-    tracker.rebuild_expense_heap()
-    top_expenses = tracker.get_top_expenses(n)
 
     st.markdown(f"### 🏅 Top {n} Expenses")
 
+    if filtered_expenses is not None:
+        # Top n of the filtered view already in memory, keeping only n at a time
+        render_top_expense_list(tracker, tracker.top_expenses_of(filtered_expenses, n))
+        return
+
+    # Optional leaderboard scope, e.g. "top 5 this month in Food"
+    col_category, col_period = st.columns(2)
+    with col_category:
+        category = st.selectbox("Category", ["All", "Food", "Utilities", "Transport", "Other"],
+                                key="top_expenses_category")
+    with col_period:
+        period = st.selectbox("Period", TOP_EXPENSE_PERIODS, key="top_expenses_period")
+
+    filters = {}
+    if category != "All":
+        filters["categories"] = [category]
+    start_date, end_date = get_period_range(period)
+    if start_date is not None:
+        filters["start_date"] = start_date
+        filters["end_date"] = end_date
+
+    # Unscoped reads use the live shared heap; scoped ones a bounded LIMIT n query.
+    # Either way the result is reused across reruns until the data changes.
+    top_expenses = cached_query("get_top_expenses", n, **filters)
+    render_top_expense_list(tracker, top_expenses)
+
+def render_top_expense_list(tracker, top_expenses):
+    # One line per expense, labelled with its standing within its year
     if top_expenses:
         for expense in top_expenses:
+            # Standing within the expense's own year, from the shared rank index
+            _, top_percent = tracker.get_expense_rank(expense, year=expense.date.year)
             st.write(
                 f"🗓️ {expense.date} — {expense.category} — "
-                f"${expense.value} ({expense.description})"
+                f"${expense.value} ({expense.description}) — "
+                f"top {top_percent:.0f}% of {expense.date.year}"
             )
     else:
         st.info("No expenses recorded yet.")
@@ -1,80 +1,148 @@
 # visualization.py
 # Visualization components of Family Expense Tracker.
-# Includes pie chart by category, bar chart by date, and CSV export.
+# Includes pie chart by category, spending over time, and data export.
 
-import seaborn as sns
-import matplotlib.pyplot as plt
-import pandas as pd
+import io
 import streamlit as st
-from models.expense import Expense
+from ui.cache import cached_export, cached_query
+from utils.conversions import from_cents, from_day, to_cents
+from utils.export import EXPORT_FORMATS, export_expenses
+from utils.timeseries import MAX_CHART_POINTS, bucket_totals, choose_bucket
 
-def render_visualization(session_state, filtered_expenses=None):
-    tracker = session_state.expense_tracker
+@st.cache_data(max_entries=32, show_spinner=False)
+def category_pie_png(category_items):
+    """
+    Pie chart of (category, amount) pairs as PNG bytes. Cached on the data
+    itself, so reruns with unchanged totals skip matplotlib entirely.
+    """
+    # Imported here so matplotlib loads only when a chart is first drawn,
+    # not at app startup. A bare Figure needs no pyplot state or GUI backend.
+    from matplotlib.figure import Figure
+
+    categories = [category for category, _ in category_items]
+    amounts = [amount for _, amount in category_items]
+    fig = Figure()
+    ax = fig.subplots()
+    ax.pie(amounts, labels=categories, autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')  # Equal aspect ratio for circle
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    return buffer.getvalue()
+
+# Axis label and time unit for each time-series bucket. Browsers parse the
+# date-only ISO strings sent below as UTC midnight, so the units are UTC too;
+# local units would show every bucket a day early west of UTC.
+BUCKET_LABELS = {
+    "day": ("Day", "utcyearmonthdate"),
+    "week": ("Week starting", "utcyearmonthdate"),
+    "month": ("Month", "utcyearmonth"),
+    "quarter": ("Quarter", "utcyearquarter"),
+    "year": ("Year", "utcyear"),
+}
+
+def spending_over_time_spec(bucket, series):
+    """
+    Vega-Lite bar chart spec for (bucket start date, amount) pairs.
+    The browser renders it, so the server sends at most MAX_CHART_POINTS
+    small records instead of rasterizing an image.
+    """
+    label, time_unit = BUCKET_LABELS[bucket]
+    return {
+        "data": {"values": [{"date": start.isoformat(), "amount": amount} for start, amount in series]},
+        "mark": {"type": "bar", "tooltip": True},
+        "encoding": {
+            "x": {"field": "date", "type": "temporal", "timeUnit": time_unit, "title": label},
+            "y": {"field": "amount", "type": "quantitative", "title": "Amount ($)"},
+        },
+    }
+
+def filtered_spending_over_time(filtered_expenses, max_points=MAX_CHART_POINTS):
+    # Same buckets as tracker.get_spending_over_time, for an in-memory list
+    days = [expense.date.toordinal() for expense in filtered_expenses]
+    cents = [to_cents(expense.value) for expense in filtered_expenses]
+    bucket = choose_bucket(min(days), max(days), max_points)
+    starts, totals = bucket_totals(days, cents, bucket)
+    return bucket, [(from_day(start), from_cents(total))
+                    for start, total in zip(starts.tolist(), totals.tolist())]
 
-    # Load expenses from DB if no filtered expenses passed
+def render_visualization(session_state, filtered_expenses=None):
     if filtered_expenses is None:
-        # Fetch all expenses from DB if available
-        if hasattr(tracker, 'db'):
-            db_expenses = tracker.db.get_expenses()
-        else:
-            db_expenses = []
-        # Convert DB rows to Expense objects for clean attribute access
-        expenses = [Expense.from_db_row(row) for row in db_expenses]
+        # Without a filter, chart data comes from aggregate queries
+        category_totals = cached_query("get_spending_by_category")
+        bucket, series = cached_query("get_spending_over_time")
     else:
-        expenses = filtered_expenses
+        # Aggregate the filtered Expense objects by category and by time bucket
+        category_totals = {}
+        for expense in filtered_expenses:
+            category_totals[expense.category] = category_totals.get(expense.category, 0) + expense.value
+        bucket, series = filtered_spending_over_time(filtered_expenses) if filtered_expenses else ("day", [])
 
     st.markdown("### 📊 Expense Breakdown by Category")
 
-    if not expenses:
+    if not category_totals:
         st.info("No expenses to visualize yet.")
         return
 
-    # Aggregate total amounts by category
-    category_totals = {}
-    for expense in expenses:
-        category_totals[expense.category] = category_totals.get(expense.category, 0) + expense.value
-
-    # Prepare DataFrame for pie chart
-    df_pie = pd.DataFrame.from_dict(category_totals, orient='index', columns=['Amount']).reset_index()
-    df_pie.rename(columns={'index': 'Category'}, inplace=True)
+    # Plot pie chart of expenses by category (cached PNG)
+    st.image(category_pie_png(tuple(category_totals.items())))
 
-    # Plot pie chart of expenses by category
-    fig1, ax1 = plt.subplots()
-    ax1.pie(df_pie['Amount'], labels=df_pie['Category'], autopct='%1.1f%%', startangle=90)
-    ax1.axis('equal')  # Equal aspect ratio for circle
-    st.pyplot(fig1)
+    st.markdown("### 📅 Expenses Over Time")
 
-    st.markdown("### 📅 Expenses Over Time (Bar Chart)")
+    # Bucketed by day, week, month, quarter or year to stay within MAX_CHART_POINTS bars
+    st.caption(f"Total spending per {bucket}")
+    st.vega_lite_chart(spending_over_time_spec(bucket, series), use_container_width=True)
 
-    # Aggregate total expenses by date for bar chart
-    df_bar = pd.DataFrame([{'Date': expense.date, 'Amount': expense.value} for expense in expenses])
-    df_bar = df_bar.groupby('Date').sum().reset_index()
+    render_export(session_state, filtered_expenses)
 
-    # Plot bar chart with seaborn
-    fig2, ax2 = plt.subplots(figsize=(8, 4))
-    sns.barplot(x='Date', y='Amount', data=df_bar, ax=ax2)
-    ax2.set_title('Total Expenses Per Day')
-    ax2.set_ylabel('Amount ($)')
-    ax2.set_xlabel('Date')
-    plt.xticks(rotation=45)
-    st.pyplot(fig2)
+def filtered_export(session_state, filtered_expenses, export_format):
+    """
+    Export bytes of a filtered list, exported as shown. They are kept on the
+    session's filtered view (see ui.filter_form.get_filtered_expenses), which
+    is replaced whenever the filters or the data version change.
+    """
+    view = session_state.get("filtered_view")
+    if view is None or view["expenses"] is not filtered_expenses:
+        view = {}  # Not the shared view; nothing to cache the bytes on
+    exports = view.setdefault("exports", {})
+    if export_format not in exports:
+        exports[export_format] = export_expenses(export_format, rows=(
+            (expense.date, expense.category, expense.value, expense.description)
+            for expense in filtered_expenses
+        ))
+    return exports[export_format]
 
+def render_export(session_state, filtered_expenses=None):
+    """
+    Download section. The whole table (optionally narrowed by date range and
+    categories) is streamed from the database and the bytes are cached per
+    data version; a filtered list on screen is exported as shown, cached with
+    the filtered view.
+    """
     st.markdown("### 📄 Download Your Expense Data")
 
-    # Prepare CSV export of expenses
-    df_export = pd.DataFrame([{
-        'Date': expense.date,
-        'Category': expense.category,
-        'Amount': expense.value,
-        'Description': expense.description
-    } for expense in expenses])
+    export_format = st.selectbox("Format", list(EXPORT_FORMATS), key="export_format")
+    extension, mime = EXPORT_FORMATS[export_format]
 
-    csv = df_export.to_csv(index=False).encode('utf-8')
+    if filtered_expenses is None:
+        filters = {}
+        with st.expander("Export options"):
+            use_range = st.checkbox("Limit to a date range", key="export_use_range")
+            if use_range:
+                col_start, col_end = st.columns(2)
+                filters["start_date"] = col_start.date_input("From", key="export_start")
+                filters["end_date"] = col_end.date_input("To", key="export_end")
+            categories = st.multiselect("Categories (all if empty)",
+                                        ["Food", "Utilities", "Transport", "Other"], key="export_categories")
+            if categories:
+                filters["categories"] = categories
+        data = cached_export(export_format, **filters)
+    else:
+        data = filtered_export(session_state, filtered_expenses, export_format)
 
-    # Download button for CSV file
+    # Download button for the export
     st.download_button(
-        label='Download CSV',
-        data=csv,
-        file_name='expense_data.csv',
-        mime='text/csv'
+        label=f'Download {export_format}',
+        data=data,
+        file_name=f'expense_data.{extension}',
+        mime=mime
     )
@@ -0,0 +1,31 @@
+# conversions.py
+# Converters between Python values and the compact storage format used in the
+# expenses table: dates are stored as day ordinals (date.toordinal()) and money
+# as integer cents, so range filters and sums are plain integer operations.
+
+from datetime import date, datetime
+
+def to_cents(amount):
+    """Convert a money amount (int, float or Decimal) to integer cents."""
+    return int(round(amount * 100))
+
+def from_cents(cents):
+    """Convert integer cents back to a money amount."""
+    return cents / 100
+
+def to_day(value):
+    """
+    Convert a date, datetime, ISO date string ('YYYY-MM-DD', optionally with a
+    time part) or an existing day ordinal to a day ordinal.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(value[:10]).toordinal()
+
+def from_day(day):
+    """Convert a day ordinal back to a datetime.date."""
+    return date.fromordinal(day)
@@ -0,0 +1,109 @@
+# export.py
+# Export of the expense table to CSV, Parquet or Arrow. Rows are streamed from
+# SQLite and written chunk by chunk, so an export never holds more than one
+# chunk of rows in Python objects next to the output bytes.
+
+import csv
+import io
+from itertools import islice
+import db
+from utils.conversions import from_cents, from_day
+
+# Rows pulled from SQLite and written per chunk
+EXPORT_CHUNK_ROWS = 5000
+
+# Output columns, in order
+EXPORT_HEADER = ['Date', 'Category', 'Amount', 'Description']
+
+# Download formats: name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+def iter_export_rows(start_date=None, end_date=None, categories=None, member_id=None):
+    """
+    Stream (date, category, amount, description) rows from the database, oldest
+    first, optionally limited to a date range, categories or a family member.
+    """
+    rows = db.iter_expenses(columns=("day", "category", "value_cents", "description"),
+                            batch_size=EXPORT_CHUNK_ROWS, order_by=[("date", True), ("id", True)],
+                            start_date=start_date, end_date=end_date,
+                            categories=categories, member_id=member_id)
+    for day, category, value_cents, description in rows:
+        yield from_day(day), category, from_cents(value_cents), description
+
+def _chunks(rows, size):
+    # Split an iterable into lists of at most size rows
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_csv_chunks(rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yield the CSV encoding of rows as UTF-8 byte chunks, header first.
+    Suitable for streaming responses or writing to a file piece by piece.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    for chunk in _chunks(rows, chunk_rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')  # Header of an empty export
+
+def write_csv(rows):
+    # CSV bytes of (date, category, amount, description) rows
+    return b"".join(iter_csv_chunks(rows))
+
+def write_arrow(rows, file_format="parquet", chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Parquet (file_format="parquet") or Arrow IPC file ("arrow") bytes of
+    (date, category, amount, description) rows. Each chunk becomes one
+    record batch (one Parquet row group), so rows are never all in Python at once.
+    Requires pyarrow, which is imported only when this runs.
+    """
+    import pyarrow as pa
+
+    schema = pa.schema([
+        ("date", pa.date32()),
+        ("category", pa.string()),
+        ("amount", pa.float64()),
+        ("description", pa.string()),
+    ])
+    sink = pa.BufferOutputStream()
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+    elif file_format == "arrow":
+        writer = pa.ipc.new_file(sink, schema)
+    else:
+        raise ValueError(f"Unknown export format '{file_format}'")
+    with writer:
+        for chunk in _chunks(rows, chunk_rows):
+            columns = zip(*chunk)
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema)
+            writer.write_table(pa.Table.from_batches([batch]))
+    return sink.getvalue().to_pybytes()
+
+def export_expenses(export_format="CSV", rows=None, **filters):
+    """
+    Export bytes in one of EXPORT_FORMATS. rows defaults to the database rows
+    matching filters (see iter_export_rows); pass rows to export an in-memory list.
+    """
+    if rows is None:
+        rows = iter_export_rows(**filters)
+    if export_format == "CSV":
+        return write_csv(rows)
+    if export_format in EXPORT_FORMATS:
+        return write_arrow(rows, EXPORT_FORMATS[export_format][0])
+    raise ValueError(f"Unknown export format '{export_format}'")
@@ -0,0 +1,58 @@
+# filters.py
+# Helpers for the filtered-expense view: a canonical, hashable key for a set of
+# filter values, and the checks that let a narrower filter be answered from the
+# rows of a wider one already in memory instead of querying again.
+
+from collections import namedtuple
+
+# Canonical filter values; None means "no bound" and categories is a sorted tuple
+FilterKey = namedtuple("FilterKey", ["start_date", "end_date", "categories", "min_amount", "max_amount"])
+
+def filter_key(filters):
+    """
+    Build a FilterKey from a filters dict like session_state.filters
+    (start_date, end_date, categories, min_amount, max_amount; all optional).
+    """
+    categories = filters.get("categories")
+    return FilterKey(
+        filters.get("start_date"),
+        filters.get("end_date"),
+        None if categories is None else tuple(sorted(categories)),
+        filters.get("min_amount"),
+        filters.get("max_amount"),
+    )
+
+def _within(inner, outer, lower):
+    # True if bound inner is at least as tight as bound outer (None is unbounded)
+    if outer is None:
+        return True
+    if inner is None:
+        return False
+    return inner >= outer if lower else inner <= outer
+
+def narrows(key, base):
+    """
+    True if every expense matching key also matches base, so the rows
+    fetched for base can be filtered in memory to answer key.
+    """
+    if base.categories is not None and (key.categories is None or
+                                        not set(key.categories) <= set(base.categories)):
+        return False
+    return (_within(key.start_date, base.start_date, lower=True)
+            and _within(key.end_date, base.end_date, lower=False)
+            and _within(key.min_amount, base.min_amount, lower=True)
+            and _within(key.max_amount, base.max_amount, lower=False))
+
+def matches(expense, key):
+    # Same semantics as db.query_expenses for one Expense object
+    if key.start_date is not None and expense.date < key.start_date:
+        return False
+    if key.end_date is not None and expense.date > key.end_date:
+        return False
+    if key.categories is not None and expense.category not in key.categories:
+        return False
+    if key.min_amount is not None and expense.value < key.min_amount:
+        return False
+    if key.max_amount is not None and expense.value > key.max_amount:
+        return False
+    return True
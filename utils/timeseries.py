@@ -0,0 +1,69 @@
+# timeseries.py
+# Helpers for spending-over-time charts: pick a bucket size (day, ISO week,
+# month, quarter or year) from the visible date range so a chart never has
+# more than a fixed number of points, and sum daily totals into those buckets.
+
+import numpy as np
+
+# Bucket sizes from finest to coarsest, with their approximate length in days
+BUCKETS = (("day", 1), ("week", 7), ("month", 30.44), ("quarter", 91.31), ("year", 365.25))
+
+# Most points drawn in one time-series chart
+MAX_CHART_POINTS = 120
+
+# Day ordinal of 1970-01-01, the epoch of numpy's datetime64
+_EPOCH_DAY = 719163
+
+def bucket_count(first_day, last_day, bucket):
+    """
+    Number of calendar-aligned buckets a range of day ordinals touches,
+    counting the partial buckets at either edge.
+    """
+    first_start, last_start = bucket_starts([first_day, last_day], bucket).tolist()
+    if bucket == "day":
+        return last_start - first_start + 1
+    if bucket == "week":
+        return (last_start - first_start) // 7 + 1
+    months = (np.array([first_start, last_start]) - _EPOCH_DAY).astype("datetime64[D]") \
+        .astype("datetime64[M]").astype(np.int64)
+    return int(months[1] - months[0]) // {"month": 1, "quarter": 3, "year": 12}[bucket] + 1
+
+def choose_bucket(first_day, last_day, max_points=MAX_CHART_POINTS):
+    """
+    Finest bucket that keeps a range of day ordinals within max_points buckets.
+    The estimate from BUCKETS lengths skips sizes that are clearly too fine;
+    the exact count, edges included, then decides. Falls back to 'year'.
+    """
+    span = last_day - first_day + 1
+    for name, length in BUCKETS:
+        if span / length <= max_points and bucket_count(first_day, last_day, name) <= max_points:
+            return name
+    return BUCKETS[-1][0]
+
+def bucket_starts(days, bucket):
+    """
+    Day ordinal of the first day of each day's bucket. Weeks start on Monday
+    (ordinal 1 is a Monday), months, quarters and years on their first day.
+    """
+    days = np.asarray(days, dtype=np.int64)
+    if bucket == "day":
+        return days
+    if bucket == "week":
+        return days - (days - 1) % 7
+    months = (days - _EPOCH_DAY).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    if bucket == "quarter":
+        months -= months % 3
+    elif bucket == "year":
+        months -= months % 12
+    elif bucket != "month":
+        raise ValueError(f"Unknown time bucket '{bucket}'")
+    return months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) + _EPOCH_DAY
+
+def bucket_totals(days, cents, bucket):
+    """
+    Sum per-day (or per-expense) values into buckets.
+    Returns a tuple of arrays (bucket start day ordinals, totals), ordered by date.
+    """
+    starts, inverse = np.unique(bucket_starts(days, bucket), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.asarray(cents, dtype=np.float64), minlength=len(starts))
+    return starts, np.rint(totals).astype(np.int64)
@@ -1,6 +1,12 @@
 # validation.py
 # Contains reusable input validation functions for the app.
 
+from datetime import date
+from decimal import Decimal
+from operator import itemgetter
+import numpy as np
+from utils.conversions import to_day
+
 def validate_member_name(name):
     if not name.strip():
         raise ValueError("Name cannot be empty.")
@@ -16,3 +22,160 @@ def validate_expense_value(value):
 def validate_category(category):
     if not category.strip():
         raise ValueError("Category must be selected.")
+
+# -----------------
+# Batch Validation
+# -----------------
+# For bulk imports: every row is checked and the problems are reported
+# instead of raising on the first one. Numeric bounds are NumPy masks.
+
+# Largest amount accepted, in cents: 2**53 is exact in float64 and fits a SQLite INTEGER
+MAX_EXPENSE_CENTS = 2 ** 53
+
+class ValidationReport:
+    def __init__(self, size):
+        """
+        Outcome of a batch validation over size rows.
+
+        Attributes:
+            valid (numpy.ndarray): Boolean mask, True for rows without errors.
+            errors (list): (row index, field, reason) tuples, ordered by row.
+        """
+        self.valid = np.ones(size, dtype=bool)
+        self.errors = []
+
+    def __len__(self):
+        # Number of rows validated
+        return len(self.valid)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def add(self, mask, field, reason):
+        # Record reason for every row where mask is True
+        for index in np.flatnonzero(mask).tolist():
+            self.errors.append((index, field, reason))
+        self.valid &= ~mask
+
+    def finish(self):
+        # Order errors by row, keeping field order within a row
+        self.errors.sort(key=lambda error: error[0])
+        return self
+
+    def valid_indices(self):
+        return np.flatnonzero(self.valid).tolist()
+
+    def select(self, rows):
+        # The rows (a sequence aligned with the report) that passed validation
+        return [rows[index] for index in self.valid_indices()]
+
+def _to_float_array(values):
+    # Convert to float64, with NaN for entries that are not numbers (strings included)
+    array = np.asarray(values)
+    if array.dtype.kind in "iuf":
+        return array.astype(np.float64)
+    converted = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            converted[i] = float(value)
+    return converted
+
+def _mask_of(values, is_bad):
+    """
+    Boolean mask of the values for which is_bad(value) is True.
+    is_bad runs once per distinct value, and the per-row lookup is a C-level
+    map over a set, so long columns with few distinct values stay cheap.
+    """
+    try:
+        bad = {value for value in set(values) if is_bad(value)}
+    except TypeError:
+        # Unhashable entries: fall back to checking every row
+        return np.fromiter(map(is_bad, values), dtype=bool, count=len(values))
+    return np.fromiter(map(bad.__contains__, values), dtype=bool, count=len(values))
+
+def _is_blank(text):
+    # True where a text field is missing or only whitespace
+    return not isinstance(text, str) or not text.strip()
+
+def _is_bad_date(value):
+    # Day ordinals must be a real date; reading back an ordinal < 1 would fail on every query
+    if isinstance(value, bool):
+        return True
+    if isinstance(value, int):
+        return not date.min.toordinal() <= value <= date.max.toordinal()
+    try:
+        to_day(value)
+    except (TypeError, ValueError, AttributeError):
+        return True
+    return False
+
+def validate_expense_columns(values, categories, dates, allowed_categories=None):
+    """
+    Validate expense fields given as equal-length columns.
+    allowed_categories optionally restricts categories to a set of names.
+    Returns a ValidationReport.
+    """
+    report = ValidationReport(len(values))
+    amounts = _to_float_array(values)
+    not_number = ~np.isfinite(amounts)  # NaN (not a number) or an infinity
+    report.add(not_number, "value", "Expense value must be a number.")
+    report.add(~not_number & (amounts <= 0), "value", "Expense value must be greater than zero.")
+    too_large = ~not_number & (np.abs(np.where(not_number, 0, amounts)) * 100 >= MAX_EXPENSE_CENTS)
+    report.add(too_large, "value", "Expense value is too large.")
+
+    blank = _mask_of(categories, _is_blank)
+    report.add(blank, "category", "Category must be selected.")
+    if allowed_categories is not None:
+        allowed = set(allowed_categories)
+        unknown = _mask_of(categories, lambda category: category not in allowed)
+        report.add(unknown & ~blank, "category", "Category is not one of the allowed categories.")
+
+    report.add(_mask_of(dates, _is_bad_date), "date", "Date must be a date or a 'YYYY-MM-DD' string.")
+    return report.finish()
+
+def _is_bad_member_id(member_id):
+    # A member id is None (unassigned) or an int (bools are rejected)
+    return member_id is not None and (not isinstance(member_id, int) or isinstance(member_id, bool))
+
+def validate_expense_rows(rows, allowed_categories=None, member_ids=None):
+    """
+    Validate (value, category, description, date[, member_id]) rows, the
+    shape accepted by tracker.add_expenses and db.add_expenses_bulk.
+    member_ids optionally restricts the member_id field to a set of known ids.
+    Returns a ValidationReport aligned with rows.
+    """
+    rows = list(rows)
+    lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+    well_formed = (lengths == 4) | (lengths == 5)
+    if not well_formed.all():
+        rows = [row if ok else (None, None, None, None) for row, ok in zip(rows, well_formed.tolist())]
+    report = validate_expense_columns(
+        list(map(itemgetter(0), rows)), list(map(itemgetter(1), rows)),
+        list(map(itemgetter(3), rows)), allowed_categories,
+    )
+    # Malformed rows report only their shape, not the placeholder fields
+    report.errors = [error for error in report.errors if well_formed[error[0]]]
+    report.add(~well_formed, "row", "Row must have 4 or 5 fields.")
+
+    members = [row[4] if len(row) == 5 else None for row in rows]
+    bad_member = _mask_of(members, _is_bad_member_id)
+    report.add(bad_member, "member_id", "Member id must be an integer.")
+    if member_ids is not None:
+        known = set(member_ids)
+        unknown = _mask_of(members, lambda member_id: member_id is not None and member_id not in known)
+        report.add(unknown & ~bad_member, "member_id", "Member id is not a known family member.")
+    return report.finish()
+
+def validate_member_columns(names, earnings):
+    """
+    Validate family member fields given as equal-length columns.
+    Returns a ValidationReport.
+    """
+    report = ValidationReport(len(names))
+    report.add(_mask_of(names, _is_blank), "name", "Name cannot be empty.")
+    amounts = _to_float_array(earnings)
+    not_number = ~np.isfinite(amounts)
+    report.add(not_number, "earnings", "Earnings must be a number.")
+    report.add(~not_number & (amounts < 0), "earnings", "Earnings cannot be negative.")
+    return report.finish()